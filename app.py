@@ -32,7 +32,10 @@ def login_form():
                 try:
                     res = supabase.auth.sign_in_with_password({"email": email, "password": password})
                     st.session_state.user = res.user
-                    st.session_state.access_token = res.session.access_token
+                    # Same dict the session's client keeps current on refresh (see SupabaseClient)
+                    st.session_state.setdefault("auth_tokens", {}).update(
+                        access_token=res.session.access_token, refresh_token=res.session.refresh_token
+                    )
                     
                     # Seed Defaults (Quick Hack for MVP)
                     try:
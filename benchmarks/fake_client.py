@@ -0,0 +1,657 @@
+"""In-memory stand-in for the supabase-py `Client`.
+
+Implements the slice of the PostgREST query builder that DataService uses
+(select with nested joins, eq/neq/gt/gte/lt/lte/in_/ilike/or_ filters, order,
+limit/range, single, insert/upsert/update/delete, rpc) plus minimal auth and
+storage, so pages and services can run without a Supabase project:
+
+    from services.supabase_client import SupabaseClient
+    SupabaseClient.set_client(FakeClient(tables))
+
+Row-level security is emulated by scoping every query to the signed-in user.
+The account-balance and balance-checkpoint triggers and the RPC functions
+from schema.sql are emulated in Python.
+"""
+import copy
+import re
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from utils.periods import period_window
+
+# Embedded resource name -> foreign key column on the querying table
+FOREIGN_KEYS = {"accounts": "account_id", "categories": "category_id"}
+
+DEFAULTS = {
+    "accounts": {"balance": 0.0},
+    "categories": {"is_default": False, "color": None},
+    "transactions": {"status": "posted", "receipt_path": None, "description": None,
+                     "merchant": None, "category_id": None},
+    "budgets": {"period": "monthly", "window_days": None},
+}
+
+UNIQUE = {
+    "categories": ("user_id", "name", "type"),
+    "budgets": ("user_id", "category_id", "period"),
+}
+
+
+class FakeAPIError(Exception):
+    """Mirrors postgrest.APIError closely enough for pages that inspect the message."""
+
+    def __init__(self, message, code=None):
+        super().__init__(f"{{'code': '{code}', 'message': '{message}'}}")
+        self.code = code
+        self.message = message
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _month_end(d):
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def _checkpoint_months(d):
+    """Month ends checkpointed for activity on `d`: its own and the previous one."""
+    return _month_end(d), d.replace(day=1) - timedelta(days=1)
+
+
+def _split_top_level(text):
+    """Splits on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, buf = [], 0, False, ""
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(buf.strip())
+            buf = ""
+        else:
+            buf += ch
+    if buf.strip():
+        parts.append(buf.strip())
+    return parts
+
+
+def _coerce(row_value, value):
+    if isinstance(row_value, bool):
+        return str(value).lower() == "true"
+    if isinstance(row_value, (int, float)):
+        return float(value)
+    return value
+
+
+_OPS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _compare(row, column, op, value):
+    actual = row.get(column)
+    if op == "is":
+        return actual is None if value in (None, "null") else actual == value
+    if op == "in":
+        return actual is not None and str(actual) in {str(v) for v in value}
+    if op in ("like", "ilike"):
+        if actual is None:
+            return False
+        # PostgREST accepts * as well as % as the wildcard
+        pattern = "^" + re.escape(str(value)).replace("\\*", ".*").replace("%", ".*").replace("_", ".") + "$"
+        return re.match(pattern, str(actual), re.I if op == "ilike" else 0) is not None
+    if actual is None:
+        return False
+    return _OPS[op](actual, _coerce(actual, value))
+
+
+def _parse_items(expr):
+    items = []
+    for part in _split_top_level(expr):
+        m = re.match(r"^(and|or)\((.*)\)$", part, re.S)
+        if m:
+            items.append((m.group(1), _parse_items(m.group(2))))
+            continue
+        column, op, value = part.split(".", 2)
+        if value.startswith('"') and value.endswith('"'):
+            value = value[1:-1]
+        items.append(("cmp", (column, op, value)))
+    return items
+
+
+def _logic(kind, items):
+    def check(row):
+        results = (_compare(row, *payload) if item_kind == "cmp" else _logic(item_kind, payload)(row)
+                   for item_kind, payload in items)
+        return all(results) if kind == "and" else any(results)
+    return check
+
+
+def _parse_logic(expr, kind="or"):
+    """Parses a PostgREST or=/and= expression into a row predicate."""
+    return _logic(kind, _parse_items(expr))
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self._op = "select"
+        self._columns = "*"
+        self._filters = []
+        self._orders = []
+        self._limit = None
+        self._offset = 0
+        self._single = None
+        self._payload = None
+        self._returning = "representation"
+        self._count = None
+        self._on_conflict = "id"
+        self._negate = False
+
+    # --- Verbs ---
+    def select(self, columns="*", count=None, **kwargs):
+        self._columns = columns
+        self._count = count
+        return self
+
+    def insert(self, json, returning="representation", count=None, upsert=False, **kwargs):
+        self._op = "upsert" if upsert else "insert"
+        self._payload = json
+        self._returning = getattr(returning, "value", returning)
+        return self
+
+    def upsert(self, json, returning="representation", on_conflict="", count=None, **kwargs):
+        self._op = "upsert"
+        self._payload = json
+        self._on_conflict = on_conflict or "id"
+        self._returning = getattr(returning, "value", returning)
+        return self
+
+    def update(self, json, returning="representation", count=None, **kwargs):
+        self._op = "update"
+        self._payload = json
+        self._returning = getattr(returning, "value", returning)
+        return self
+
+    def delete(self, returning="representation", count=None, **kwargs):
+        self._op = "delete"
+        self._returning = getattr(returning, "value", returning)
+        return self
+
+    # --- Filters ---
+    def _add(self, column, op, value):
+        negate, self._negate = self._negate, False
+        self._filters.append(lambda row: _compare(row, column, op, value) != negate)
+        return self
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def eq(self, column, value): return self._add(column, "eq", value)
+    def neq(self, column, value): return self._add(column, "neq", value)
+    def gt(self, column, value): return self._add(column, "gt", value)
+    def gte(self, column, value): return self._add(column, "gte", value)
+    def lt(self, column, value): return self._add(column, "lt", value)
+    def lte(self, column, value): return self._add(column, "lte", value)
+    def like(self, column, value): return self._add(column, "like", value)
+    def ilike(self, column, value): return self._add(column, "ilike", value)
+    def is_(self, column, value): return self._add(column, "is", value)
+    def in_(self, column, values): return self._add(column, "in", list(values))
+
+    def or_(self, filters, reference_table=None):
+        self._filters.append(_parse_logic(filters))
+        return self
+
+    def filter(self, column, operator, criteria):
+        return self._add(column, operator, criteria)
+
+    def match(self, query):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    # --- Modifiers ---
+    def order(self, column, desc=False, nullsfirst=None, foreign_table=None):
+        self._orders.append((column, desc))
+        return self
+
+    def limit(self, size, foreign_table=None):
+        self._limit = size
+        return self
+
+    def offset(self, size):
+        self._offset = size
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self):
+        self._single = "single"
+        return self
+
+    def maybe_single(self):
+        self._single = "maybe"
+        return self
+
+    # --- Execution ---
+    def _matching(self):
+        rows = self.client._visible(self.table_name)
+        for f in self._filters:
+            rows = [r for r in rows if f(r)]
+        return rows
+
+    def execute(self):
+        handler = getattr(self, f"_execute_{self._op}")
+        return handler()
+
+    def _execute_select(self):
+        rows = self._matching()
+        for column, desc in reversed(self._orders):
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            # Postgres: NULLS LAST ascending, NULLS FIRST descending
+            rows = missing + present if desc else present + missing
+        count = len(rows) if self._count else None
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        data = [self.client._project(self.table_name, r, self._columns) for r in rows]
+        if self._single:
+            if len(data) != 1:
+                if self._single == "maybe" and not data:
+                    return None
+                raise FakeAPIError("JSON object requested, multiple (or no) rows returned", "PGRST116")
+            return FakeResponse(data[0], count)
+        return FakeResponse(data, count)
+
+    def _result(self, rows):
+        if self._returning == "minimal":
+            return FakeResponse([], None)
+        return FakeResponse(copy.deepcopy(rows), None)
+
+    def _execute_insert(self):
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        rows = [self.client._insert_row(self.table_name, dict(p)) for p in payload]
+        self.client._after_write(self.table_name, [], rows)
+        return self._result(rows)
+
+    def _execute_upsert(self):
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        keys = [k.strip() for k in self._on_conflict.split(",")]
+        table = self.client.tables[self.table_name]
+        old_rows, new_rows = [], []
+        for p in payload:
+            existing = next((r for r in table if all(r.get(k) == p.get(k) for k in keys)), None)
+            if existing:
+                old_rows.append(dict(existing))
+                existing.update(p)
+                existing["updated_at"] = _now()
+                new_rows.append(existing)
+            else:
+                new_rows.append(self.client._insert_row(self.table_name, dict(p)))
+        self.client._after_write(self.table_name, old_rows, new_rows)
+        return self._result(new_rows)
+
+    def _execute_update(self):
+        rows = self._matching()
+        old_rows = [dict(r) for r in rows]
+        for r in rows:
+            r.update(self._payload)
+            r["updated_at"] = _now()
+        self.client._after_write(self.table_name, old_rows, rows)
+        return self._result(rows)
+
+    def _execute_delete(self):
+        rows = self._matching()
+        self.client._delete_rows(self.table_name, rows)
+        return self._result(rows)
+
+
+class FakeRPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self):
+        fn = getattr(self.client, f"_rpc_{self.name}", None)
+        if fn is None:
+            raise FakeAPIError(f"Could not find the function public.{self.name}", "PGRST202")
+        return FakeResponse(fn(**self.params))
+
+
+class FakeAuth:
+    def __init__(self, client):
+        self.client = client
+        self.users = {}
+
+    def sign_up(self, credentials):
+        user = SimpleNamespace(id=str(uuid.uuid4()), email=credentials["email"])
+        self.users[credentials["email"]] = (credentials["password"], user)
+        return SimpleNamespace(user=user, session=None)
+
+    def sign_in_with_password(self, credentials):
+        password, user = self.users.get(credentials["email"], (None, None))
+        if user is None or password != credentials["password"]:
+            raise FakeAPIError("Invalid login credentials", "400")
+        self.client.user_id = user.id
+        return SimpleNamespace(user=user, session=SimpleNamespace(access_token=f"fake-token-{user.id}",
+                                                              refresh_token=f"fake-refresh-{user.id}"))
+
+    def sign_out(self):
+        self.client.user_id = None
+
+
+class FakeBucket:
+    def __init__(self, objects, name):
+        self.objects = objects
+        self.name = name
+
+    def upload(self, path, file, file_options=None):
+        key = (self.name, path)
+        if key in self.objects:
+            raise FakeAPIError("The resource already exists", "409")
+        self.objects[key] = (bytes(file), (file_options or {}).get("content-type"))
+        return SimpleNamespace(path=path, full_path=f"{self.name}/{path}")
+
+    def download(self, path):
+        return self.objects[(self.name, path)][0]
+
+    def remove(self, paths):
+        for p in paths:
+            self.objects.pop((self.name, p), None)
+        return [{"name": p} for p in paths]
+
+    def list(self, path=None, options=None):
+        prefix = f"{path.rstrip('/')}/" if path else ""
+        names = sorted(p[len(prefix):] for b, p in self.objects if b == self.name and p.startswith(prefix))
+        return [{"name": n} for n in names if "/" not in n]
+
+    def _signed(self, path, expires_in):
+        return f"https://fake.supabase.local/storage/v1/object/sign/{self.name}/{path}?expires_in={expires_in}"
+
+    def create_signed_url(self, path, expires_in, options=None):
+        if (self.name, path) not in self.objects:
+            raise FakeAPIError("Object not found", "404")
+        url = self._signed(path, expires_in)
+        return {"signedURL": url, "signedUrl": url}
+
+    def create_signed_urls(self, paths, expires_in, options=None):
+        signed = []
+        for p in paths:
+            url = self._signed(p, expires_in) if (self.name, p) in self.objects else None
+            signed.append({"path": p, "signedURL": url, "signedUrl": url, "error": None if url else "Either the object does not exist or you do not have access to it"})
+        return signed
+
+
+class FakeStorage:
+    def __init__(self):
+        self.objects = {}
+
+    def from_(self, bucket):
+        return FakeBucket(self.objects, bucket)
+
+
+class FakeClient:
+    def __init__(self, tables=None, user_id=None):
+        self.tables = defaultdict(list)
+        for name, rows in (tables or {}).items():
+            self.tables[name] = [dict(r) for r in rows]
+        self.user_id = user_id
+        if "account_balance_checkpoints" not in self.tables:
+            self._rebuild_checkpoints()
+        self.auth = FakeAuth(self)
+        self.storage = FakeStorage()
+        self.calls = 0
+
+    def table(self, name):
+        self.calls += 1
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name, params=None):
+        self.calls += 1
+        return FakeRPC(self, name, params)
+
+    # --- Rows ---
+    def _visible(self, table):
+        rows = self.tables[table]
+        if self.user_id is None:
+            return list(rows)
+        return [r for r in rows if r.get("user_id") in (None, self.user_id)]
+
+    def _project(self, table, row, columns):
+        out = {}
+        for part in _split_top_level(columns):
+            m = re.match(r"^(\w+)\((.*)\)$", part, re.S)
+            if m:
+                rel, sub_columns = m.group(1), m.group(2)
+                target_id = row.get(FOREIGN_KEYS[rel])
+                target = next((r for r in self._index(rel).get(target_id, [])), None) if target_id else None
+                out[rel] = self._project(rel, target, sub_columns) if target else None
+            elif part == "*":
+                out.update(copy.deepcopy(row))
+            else:
+                out[part] = copy.deepcopy(row.get(part))
+        return out
+
+    def _index(self, table):
+        index = defaultdict(list)
+        for r in self.tables[table]:
+            index[r["id"]].append(r)
+        return index
+
+    def _insert_row(self, table, row):
+        for k, v in DEFAULTS.get(table, {}).items():
+            row.setdefault(k, v)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", _now())
+        row.setdefault("updated_at", _now())
+        if isinstance(row.get("date"), date):
+            row["date"] = row["date"].isoformat()
+        for k in ("amount", "balance", "amount_limit"):
+            if row.get(k) is not None:
+                row[k] = float(row[k])
+        keys = UNIQUE.get(table)
+        if keys and any(all(r.get(k) == row.get(k) for k in keys) for r in self.tables[table]):
+            raise FakeAPIError(f"duplicate key value violates unique constraint \"{table}_key\"", "23505")
+        self.tables[table].append(row)
+        return row
+
+    def _delete_rows(self, table, rows):
+        ids = {r["id"] for r in rows}
+        self.tables[table] = [r for r in self.tables[table] if r["id"] not in ids]
+        self._after_write(table, rows, [])
+        # ON DELETE CASCADE / SET NULL from schema.sql
+        if table == "accounts":
+            doomed = [t for t in self.tables["transactions"] if t.get("account_id") in ids]
+            if doomed:
+                self._delete_rows("transactions", doomed)
+        elif table == "categories":
+            for t in self.tables["transactions"]:
+                if t.get("category_id") in ids:
+                    t["category_id"] = None
+            self.tables["budgets"] = [b for b in self.tables["budgets"] if b.get("category_id") not in ids]
+        if table == "accounts":
+            self.tables["account_balance_checkpoints"] = [
+                c for c in self.tables["account_balance_checkpoints"] if c["account_id"] not in ids
+            ]
+
+    def _after_write(self, table, old_rows, new_rows):
+        if table == "accounts":
+            # trg_accounts_checkpoint_shift: hand-edited balances shift the history
+            before = {r["id"]: float(r["balance"]) for r in old_rows}
+            for r in new_rows:
+                delta = float(r["balance"]) - before.get(r["id"], float(r["balance"]))
+                if delta:
+                    for c in self.tables["account_balance_checkpoints"]:
+                        if c["account_id"] == r["id"]:
+                            c["balance"] = round(c["balance"] + delta, 2)
+            return
+        # trg_transactions_balance_*: one delta per account
+        if table != "transactions":
+            return
+        deltas = defaultdict(float)
+        for r in old_rows:
+            if r.get("account_id"):
+                deltas[r["account_id"]] -= float(r["amount"])
+        for r in new_rows:
+            if r.get("account_id"):
+                deltas[r["account_id"]] += float(r["amount"])
+        accounts = self._index("accounts")
+        for account_id, delta in deltas.items():
+            for acc in accounts.get(account_id, []):
+                acc["balance"] = round(float(acc["balance"]) + delta, 2)
+
+        # trg_transactions_checkpoint_*: runs after the balances above are updated
+        moved = [(r["account_id"], r["date"], -float(r["amount"])) for r in old_rows if r.get("account_id")]
+        moved += [(r["account_id"], r["date"], float(r["amount"])) for r in new_rows if r.get("account_id")]
+        checkpoints = self.tables["account_balance_checkpoints"]
+        for c in checkpoints:
+            delta = sum(amount for account_id, d, amount in moved
+                        if account_id == c["account_id"] and d <= c["month_end"])
+            if delta:
+                c["balance"] = round(c["balance"] + delta, 2)
+        existing = {(c["account_id"], c["month_end"]) for c in checkpoints}
+        for account_id, d, _ in moved:
+            acc = accounts.get(account_id)
+            for month_end in _checkpoint_months(date.fromisoformat(d)):
+                key = (account_id, month_end.isoformat())
+                if key in existing or not acc:
+                    continue
+                later = sum(float(t["amount"]) for t in self.tables["transactions"]
+                            if t.get("account_id") == account_id and t["date"] > key[1])
+                checkpoints.append({"account_id": account_id, "user_id": acc[0]["user_id"], "month_end": key[1],
+                                    "balance": round(float(acc[0]["balance"]) - later, 2)})
+                existing.add(key)
+
+    def _rebuild_checkpoints(self):
+        """The backfill statement from schema.sql section 14, in one pass per account."""
+        nets = defaultdict(lambda: defaultdict(float))
+        for t in self.tables["transactions"]:
+            if t.get("account_id"):
+                nets[t["account_id"]][_month_end(date.fromisoformat(t["date"]))] += float(t["amount"])
+        accounts = self._index("accounts")
+        rows = []
+        for account_id, by_month in nets.items():
+            if account_id not in accounts:
+                continue
+            acc = accounts[account_id][0]
+            wanted = {m for month_end in by_month for m in _checkpoint_months(month_end)}
+            month_nets = sorted(by_month.items(), reverse=True)
+            i, later = 0, 0.0
+            for month_end in sorted(wanted, reverse=True):
+                while i < len(month_nets) and month_nets[i][0] > month_end:
+                    later += month_nets[i][1]
+                    i += 1
+                rows.append({"account_id": account_id, "user_id": acc["user_id"], "month_end": month_end.isoformat(),
+                             "balance": round(float(acc["balance"]) - later, 2)})
+        self.tables["account_balance_checkpoints"] = rows
+
+    def _txns_between(self, start, end):
+        return [t for t in self._visible("transactions") if start <= t["date"] <= end]
+
+    # --- RPC functions from schema.sql ---
+    def _rpc_dashboard_kpis(self, p_start, p_end):
+        amounts = [float(t["amount"]) for t in self._txns_between(p_start, p_end)]
+        income = sum(a for a in amounts if a > 0)
+        expenses = sum(a for a in amounts if a < 0)
+        return [{"income": income, "expenses": expenses, "net": income + expenses, "txn_count": len(amounts)}]
+
+    def _rpc_dashboard_category_totals(self, p_start, p_end):
+        cats = self._index("categories")
+        totals = defaultdict(float)
+        for t in self._txns_between(p_start, p_end):
+            if float(t["amount"]) < 0:
+                totals[t.get("category_id")] -= float(t["amount"])
+        rows = []
+        for cat_id, total in totals.items():
+            cat = cats.get(cat_id, [None])[0] if cat_id else None
+            rows.append({"category_id": cat_id, "category_name": cat["name"] if cat else "Uncategorized",
+                         "color": cat.get("color") if cat else None, "total": total})
+        return sorted(rows, key=lambda r: -r["total"])
+
+    def _rpc_dashboard_period_totals(self, p_start, p_end, p_bucket="day"):
+        buckets = defaultdict(lambda: {"income": 0.0, "expenses": 0.0, "net": 0.0})
+        for t in self._txns_between(p_start, p_end):
+            d = date.fromisoformat(t["date"])
+            if p_bucket == "week":
+                d = d - timedelta(days=d.weekday())
+            elif p_bucket == "month":
+                d = d.replace(day=1)
+            elif p_bucket == "quarter":
+                d = d.replace(month=(d.month - 1) // 3 * 3 + 1, day=1)
+            elif p_bucket == "year":
+                d = d.replace(month=1, day=1)
+            amount = float(t["amount"])
+            b = buckets[d.isoformat()]
+            b["income" if amount > 0 else "expenses"] += amount
+            b["net"] += amount
+        return [{"period_start": k, **v} for k, v in sorted(buckets.items())]
+
+    def _rpc_account_daily_net(self, p_account_id, p_after, p_end, p_limit=1000):
+        nets = defaultdict(float)
+        for t in self._visible("transactions"):
+            if t.get("account_id") == p_account_id and p_after < t["date"] <= p_end:
+                nets[t["date"]] += float(t["amount"])
+        return [{"date": d, "net": round(n, 2)} for d, n in sorted(nets.items())[:p_limit]]
+
+    def _rpc_update_transactions(self, p_rows):
+        by_id = {r["id"]: r for r in self._visible("transactions")}
+        old_rows, new_rows = [], []
+        for p in p_rows:
+            row = by_id.get(p["id"])
+            if row is None:
+                continue
+            old_rows.append(dict(row))
+            row.update(p)
+            row["updated_at"] = _now()
+            new_rows.append(row)
+        self._after_write("transactions", old_rows, new_rows)
+        return len(new_rows)
+
+    def _rpc_budget_status(self, p_as_of, p_history=0):
+        as_of = date.fromisoformat(p_as_of)
+        cats = self._index("categories")
+        spend = defaultdict(list)
+        for t in self._visible("transactions"):
+            if float(t["amount"]) < 0 and t.get("category_id"):
+                spend[t["category_id"]].append((t["date"], -float(t["amount"])))
+        rows = []
+        for b in self._visible("budgets"):
+            cat = cats.get(b["category_id"], [None])[0]
+            for idx in range(p_history + 1):
+                start, end = period_window(b["period"], as_of, idx, b.get("window_days"))
+                s, e = start.isoformat(), end.isoformat()
+                rows.append({
+                    "budget_id": b["id"], "category_id": b["category_id"],
+                    "category_name": cat["name"] if cat else None,
+                    "amount_limit": b["amount_limit"], "period": b["period"], "window_days": b.get("window_days"),
+                    "window_index": idx, "window_start": s, "window_end": e,
+                    "spent": sum(a for d, a in spend[b["category_id"]] if s <= d <= e)
+                })
+        return sorted(rows, key=lambda r: (r["category_name"] or "", r["period"], r["window_index"]))
@@ -0,0 +1,101 @@
+"""Measures the cold import cost of each page script.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --save-baseline imports.json
+    python -m benchmarks.import_time --baseline imports.json
+
+Each page is loaded in a fresh interpreter (module level only; `show()` is not
+called), so the numbers are what the first visitor of a page pays after a
+deploy. `import streamlit` alone is reported first since every page shares it.
+Exits non-zero when a page got slower than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = sorted(p.name for p in (ROOT / "pages").glob("[0-9][0-9]_*.py"))
+# Below this many seconds a slowdown is noise, whatever the ratio
+MIN_DELTA = 0.02
+
+_LOAD_PAGE = """
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("page", sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(time.perf_counter() - start)
+"""
+_LOAD_STREAMLIT = "import time; start = time.perf_counter(); import streamlit; print(time.perf_counter() - start)"
+
+
+def measure(code, *args):
+    """(seconds, heaviest top-level imports) for one fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code, *args],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    seconds = float(proc.stdout.strip().splitlines()[-1])
+    heaviest = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[0].startswith("import time:") or "cumulative" in parts[1]:
+            continue
+        name = parts[2].rstrip()
+        if name.startswith(" ") and not name.startswith("  "):  # top-level imports only
+            heaviest[name.strip()] = int(parts[1]) / 1e6
+    top = sorted(heaviest.items(), key=lambda kv: -kv[1])[:3]
+    return seconds, top
+
+
+def run(repeat):
+    results = {}
+    cases = [("streamlit", (_LOAD_STREAMLIT,))]
+    cases += [(page, (_LOAD_PAGE, str(ROOT / "pages" / page))) for page in PAGES]
+    for name, args in cases:
+        samples = [measure(*args) for _ in range(repeat)]
+        results[name] = {
+            "seconds": statistics.median(s for s, _ in samples),
+            "heaviest": samples[-1][1],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    width = max(len(n) for n in results)
+    for name, r in results.items():
+        top = ", ".join(f"{mod} {sec * 1000:.0f}ms" for mod, sec in r["heaviest"])
+        print(f"  {name:<{width}}  {r['seconds'] * 1000:8.0f} ms   {top}")
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = [
+            (name, baseline[name]["seconds"], r["seconds"]) for name, r in results.items()
+            if name in baseline
+            and r["seconds"] > baseline[name]["seconds"] * args.threshold
+            and r["seconds"] - baseline[name]["seconds"] > MIN_DELTA
+        ]
+        if regressions:
+            print("\nRegressions:")
+            for name, before, after in regressions:
+                print(f"  {name}: {before * 1000:.0f} ms -> {after * 1000:.0f} ms")
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
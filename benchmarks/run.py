@@ -0,0 +1,198 @@
+"""Times DataService methods and each page's data path against synthetic datasets.
+
+    python -m benchmarks.run --sizes 10000 100000 --repeat 5
+    python -m benchmarks.run --sizes 10000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --sizes 10000 --baseline benchmarks/baseline.json
+
+Everything runs against FakeClient, so timings measure this app's own work
+(query building, pagination loops, pandas, rendering) rather than the network;
+`calls` is the number of PostgREST/RPC requests a real project would receive.
+Exits non-zero when a case is slower than the baseline by more than --threshold,
+or when the debug panel's recorder (utils/metrics) misses or double-counts a
+request that a service case made.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import streamlit as st
+import streamlit.logger
+
+from benchmarks.fake_client import FakeClient
+from benchmarks.synthetic import generate
+from services.data_service import DataService
+from services.supabase_client import SupabaseClient
+from utils import metrics
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = sorted(p.name for p in (ROOT / "pages").glob("[0-9][0-9]_*.py"))
+# Below this many seconds a slowdown is noise, whatever the ratio
+MIN_DELTA = 0.005
+
+
+def service_cases(ds, accounts, today):
+    year_ago = today - timedelta(days=365)
+    quarter_ago = today - timedelta(days=90)
+    new_rows = [{"account_id": accounts[0]["id"], "date": today, "amount": -1.0, "merchant": "Benchmark"}] * 500
+    return {
+        "get_accounts": ds.get_accounts,
+        "get_categories": ds.get_categories,
+        "get_budgets": ds.get_budgets,
+        "get_transactions_page": lambda: ds.get_transactions_page(quarter_ago, today),
+        "get_transactions_page[receipts]": lambda: ds.get_transactions_page(year_ago, today, with_receipt=True),
+        "get_transactions[1y]": lambda: ds.get_transactions(year_ago, today),
+        "search_transactions": lambda: ds.search_transactions("whole foods"),
+        "get_transactions_frame[1y]": lambda: ds.get_transactions_frame(year_ago, today),
+        "get_dashboard_kpis": lambda: ds.get_dashboard_kpis(year_ago, today),
+        "get_category_totals": lambda: ds.get_category_totals(year_ago, today),
+        "get_period_totals[month]": lambda: ds.get_period_totals(year_ago, today, "month"),
+        "get_budget_status[history=3]": lambda: ds.get_budget_status(today, 3),
+        "create_transaction": lambda: ds.create_transaction(accounts[0]["id"], today, -1.0, None, None, "Benchmark"),
+        "bulk_create_transactions[500]": lambda: ds.bulk_create_transactions(new_rows),
+    }
+
+
+def time_call(fn, client, repeat):
+    """Median cold-cache wall time and the request count of one call."""
+    samples = []
+    for _ in range(repeat):
+        DataService._cache.invalidate()
+        client.calls = 0
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(samples), "calls": client.calls}
+
+
+def check_metrics(client, accounts):
+    """Service cases whose requests the debug recorder did not count one-for-one."""
+    st.session_state.debug_metrics = True
+    try:
+        # A DataService built with the toggle on holds the traced client and its recorder
+        recorder = st.session_state._call_metrics = metrics.CallMetrics()
+        cases = service_cases(DataService(), accounts, date.today())
+        mismatched = []
+        for name, fn in cases.items():
+            DataService._cache.invalidate()
+            client.calls = 0
+            recorder.begin_rerun()
+            fn()
+            recorded = sum(not r["cache_hit"] and not r["table"].startswith("storage:") for r in recorder.current)
+            if recorded != client.calls:
+                mismatched.append(f"{name}: recorded {recorded} of {client.calls} calls")
+        return mismatched
+    finally:
+        st.session_state.debug_metrics = False
+        st.session_state.pop("_call_metrics", None)
+
+
+def time_page(page, client, user, repeat, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    samples, error = [], None
+    for _ in range(repeat):
+        DataService._cache.invalidate()
+        client.calls = 0
+        at = AppTest.from_file(str(ROOT / "pages" / page), default_timeout=timeout)
+        at.session_state["user"] = user
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+        if at.exception:
+            error = at.exception[0].message
+            break
+    return {"seconds": statistics.median(samples), "calls": client.calls, "error": error}
+
+
+def run_size(size, repeat, pages, timeout):
+    user_id, tables = generate(size)
+    client = FakeClient(tables, user_id=user_id)
+    SupabaseClient.set_client(client)
+    user = SimpleNamespace(id=user_id, email="bench@example.com")
+    st.session_state.user = user
+
+    ds = DataService()
+    results = {}
+    for name, fn in service_cases(ds, tables["accounts"], date.today()).items():
+        results[name] = time_call(fn, client, repeat)
+    for page in pages:
+        results[f"page:{page}"] = time_page(page, client, user, repeat, timeout)
+    return results, check_metrics(client, tables["accounts"])
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for size, cases in results.items():
+        for name, r in cases.items():
+            base = baseline.get(size, {}).get(name)
+            if not base or r.get("error"):
+                continue
+            slower = r["seconds"] - base["seconds"]
+            if r["seconds"] > base["seconds"] * threshold and slower > MIN_DELTA:
+                regressions.append((size, name, base["seconds"], r["seconds"]))
+            elif r["calls"] > base["calls"]:
+                regressions.append((size, f"{name} (calls {base['calls']} -> {r['calls']})",
+                                    base["seconds"], r["seconds"]))
+    return regressions
+
+
+def report(results):
+    for size, cases in results.items():
+        print(f"\n== {int(size):,} transactions ==")
+        width = max(len(n) for n in cases)
+        for name, r in cases.items():
+            line = f"  {name:<{width}}  {r['seconds'] * 1000:10.1f} ms  {r['calls']:5d} calls"
+            if r.get("error"):
+                line += f"  ERROR: {r['error'].splitlines()[0]}"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pages", nargs="*", default=None, help="Page files to run (default: all); pass none to skip")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds per page run")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    # Bare-mode Streamlit warns on every session_state access outside `streamlit run`
+    streamlit.logger.set_log_level("error")
+    pages = PAGES if args.pages is None else args.pages
+
+    results, untraced = {}, []
+    for size in args.sizes:
+        results[str(size)], mismatched = run_size(size, args.repeat, pages, args.timeout)
+        untraced += [f"[{size}] {m}" for m in mismatched]
+    report(results)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if untraced:
+        print("\nRequests missing from the debug metrics:")
+        for line in untraced:
+            print(f"  {line}")
+        return 1
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for size, name, before, after in regressions:
+                print(f"  [{size}] {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Deterministic synthetic datasets for the in-memory client."""
+import random
+import uuid
+from datetime import date, timedelta
+
+from utils.periods import BUDGET_PERIODS
+
+ACCOUNTS = [("Checking", "checking"), ("Savings", "savings"), ("Visa", "credit"), ("Wallet", "cash")]
+CATEGORIES = [
+    ("Salary", "income", "#2ecc71"),
+    ("Food", "expense", "#e67e22"),
+    ("Rent", "expense", "#8e44ad"),
+    ("Utilities", "expense", "#3498db"),
+    ("Entertainment", "expense", "#e74c3c"),
+    ("Transport", "expense", "#16a085"),
+    ("Shopping", "expense", "#f1c40f"),
+]
+MERCHANTS = ["Whole Foods", "Shell", "Netflix", "Amazon", "Uber", "Target", "Starbucks", "Comcast", "Landlord LLC"]
+
+
+def generate(n_transactions: int, user_id: str = None, days: int = 730, seed: int = 0, end: date = None):
+    """Returns (user_id, tables) with `n_transactions` spread over the last `days` days."""
+    rng = random.Random(seed)
+    uid = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    user_id = user_id or uid()
+    end = end or date.today()
+    created = f"{(end - timedelta(days=days)).isoformat()}T00:00:00+00:00"
+
+    accounts = [{"id": uid(), "user_id": user_id, "name": name, "type": kind, "balance": 0.0,
+                 "created_at": created, "updated_at": created} for name, kind in ACCOUNTS]
+    categories = [{"id": uid(), "user_id": user_id, "name": name, "type": kind, "color": color,
+                   "is_default": True, "created_at": created, "updated_at": created}
+                  for name, kind, color in CATEGORIES]
+    income = [c for c in categories if c["type"] == "income"]
+    expense = [c for c in categories if c["type"] == "expense"]
+
+    transactions = []
+    for _ in range(n_transactions):
+        account = rng.choice(accounts)
+        is_income = rng.random() < 0.08
+        category = rng.choice(income if is_income else expense)
+        amount = round(rng.uniform(500, 4000), 2) if is_income else -round(rng.lognormvariate(3, 1), 2)
+        day = end - timedelta(days=rng.randrange(days))
+        ts = f"{day.isoformat()}T12:00:00+00:00"
+        txn_id = uid()
+        transactions.append({
+            "id": txn_id, "user_id": user_id, "account_id": account["id"], "category_id": category["id"],
+            "date": day.isoformat(), "amount": amount, "merchant": rng.choice(MERCHANTS),
+            "description": None, "status": "posted",
+            "receipt_path": f"{user_id}/{txn_id}.jpg" if rng.random() < 0.05 else None,
+            "created_at": ts, "updated_at": ts,
+        })
+        account["balance"] = round(account["balance"] + amount, 2)
+
+    budgets = []
+    for i, category in enumerate(expense):
+        period = BUDGET_PERIODS[i % len(BUDGET_PERIODS)]
+        budgets.append({"id": uid(), "user_id": user_id, "category_id": category["id"],
+                        "amount_limit": float(rng.choice([100, 250, 500, 1000])), "period": period,
+                        "window_days": 30 if period == "rolling" else None,
+                        "created_at": created, "updated_at": created})
+
+    return user_id, {"accounts": accounts, "categories": categories,
+                     "transactions": transactions, "budgets": budgets}
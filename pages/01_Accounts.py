@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
+from datetime import date, timedelta
 from services.data_service import DataService
 from utils.ui import setup_sidebar
+from utils.charts import downsample_minmax
 
 def show():
     setup_sidebar()
@@ -23,6 +25,22 @@ def show():
     else:
         st.info("No accounts found. Create one below!")
 
+    # Balance over time, rebuilt from month-end checkpoints
+    if accounts:
+        st.subheader("Balance Over Time")
+        col_acc, col_range = st.columns([1, 2])
+        with col_acc:
+            history_acc = st.selectbox("Account", accounts, format_func=lambda a: a['name'], key="balance_history_account")
+        with col_range:
+            today = date.today()
+            history_range = st.date_input("Date Range", value=(today - timedelta(days=365), today), key="balance_history_range")
+
+        # The date input returns a single date while a range is being picked
+        if isinstance(history_range, tuple) and len(history_range) == 2:
+            history = data_service.get_balance_history(history_acc['id'], history_range[0], history_range[1])
+            if not history.empty:
+                st.line_chart(downsample_minmax(history, "balance"), x="date", y="balance")
+
     st.divider()
 
     # 2. Create Account Form
@@ -1,21 +1,63 @@
 import streamlit as st
 from services.data_service import DataService
+from services.category_service import CategoryClassifier
+from services.storage_service import StorageService
 import pandas as pd
 from datetime import date
 from utils.ui import setup_sidebar
 
+PAGE_SIZE = 50
+AUTO_CATEGORY = "✨ Auto (from merchant)"
+DEFAULT_START = date(2023, 1, 1)
+
 def show():
     setup_sidebar()
     st.title("Transactions")
     
     data_service = DataService()
-    accounts = data_service.get_accounts()
-    categories = data_service.get_categories()
+
+    # History filters live in session_state (see the widgets below), so the
+    # current page can be fetched in parallel with the reference data
+    start_date = st.session_state.get("txn_start", DEFAULT_START)
+    end_date = st.session_state.get("txn_end", date.today())
+    search = st.session_state.get("txn_search", "").strip()
+
+    # Keyset paging: remember the cursor that starts each page we've visited
+    filter_key = (start_date, end_date, search)
+    if st.session_state.get("txn_filter_key") != filter_key:
+        st.session_state.txn_filter_key = filter_key
+        st.session_state.txn_page_cursors = [None]
+    cursors = st.session_state.txn_page_cursors
+    page_no = len(cursors)
+
+    def load_history():
+        try:
+            if search:
+                return data_service.search_transactions(
+                    search, {"start_date": start_date, "end_date": end_date}, page=cursors[-1], page_size=PAGE_SIZE
+                )
+            return data_service.get_transactions_page(
+                start_date=start_date, end_date=end_date, after=cursors[-1], page_size=PAGE_SIZE
+            )
+        except Exception as e:
+            st.error(f"Error fetching transactions: {e}")
+            return [], None
+
+    loaded = data_service.fetch_concurrently(
+        accounts=data_service.get_accounts,
+        categories=data_service.get_categories,
+        history=load_history
+    )
+    accounts = loaded["accounts"]
+    categories = loaded["categories"]
+    txns, next_cursor = loaded["history"]
     
     # Ensure they have accounts/categories before adding transaction
     if not accounts:
         st.warning("Please create an Account first!")
         return
+    acct_ids = {a['name']: a['id'] for a in accounts}
+    cat_ids = {c['name']: c['id'] for c in categories}
 
     # --- Add Transaction Form ---
     with st.expander("➕ Add New Transaction", expanded=False):
@@ -39,7 +81,9 @@ def show():
                 
                 # Fallback if no categories exist yet - maybe auto-create logic in Phase 3?
                 # For now just showing what exists.
-                category_name = st.selectbox("Category", list(cat_map.keys()) if cat_map else ["Uncategorized"])
+                # Auto is opt-in, listed last, so the default is still a real category
+                category_name = st.selectbox("Category", list(cat_map.keys()) + [AUTO_CATEGORY] if cat_map else ["Uncategorized"],
+                                             help="Auto picks the category you've used most for this merchant.")
                 
                 # Payment flow
                 txn_type = st.radio("Type", ["Expense", "Income"], horizontal=True)
@@ -58,17 +102,24 @@ def show():
                         
                         # Handle Category ID
                         cat_id = cat_map.get(category_name) if cat_map else None
+                        if category_name == AUTO_CATEGORY:
+                            # Only categories of the chosen type, so an expense never lands in Salary
+                            same_type = [c['id'] for c in categories if c['type'] == txn_type.lower()]
+                            cat_id = CategoryClassifier(data_service).predict(merchant, same_type)
                         
-                        data_service.create_transaction(
-                            account_id=account_map[account_name],
-                            date_obj=txn_date,
-                            amount=final_amount,
-                            category_id=cat_id,
-                            description=description,
-                            merchant=merchant
-                        )
-                        st.success("Transaction Saved!")
-                        st.rerun()
+                        if category_name == AUTO_CATEGORY and cat_id is None:
+                            st.error("No category found for this merchant. Pick one instead of Auto.")
+                        else:
+                            data_service.create_transaction(
+                                account_id=account_map[account_name],
+                                date_obj=txn_date,
+                                amount=final_amount,
+                                category_id=cat_id,
+                                description=description,
+                                merchant=merchant
+                            )
+                            st.success("Transaction Saved!")
+                            st.rerun()
                     except Exception as e:
                         st.error(f"Error saving: {e}")
 
@@ -78,84 +129,111 @@ def show():
     st.subheader("History")
     
     # Simple Filters
+    st.text_input("Search", key="txn_search", placeholder="Merchant or description, e.g. amazon")
     col_f1, col_f2 = st.columns(2)
     with col_f1:
-        start_date = st.date_input("Start Date", value=date(2023,1,1))
+        st.date_input("Start Date", value=DEFAULT_START, key="txn_start")
     with col_f2:
-        end_date = st.date_input("End Date", value=date.today())
-
-    txns = data_service.get_transactions(start_date=start_date, end_date=end_date)
+        st.date_input("End Date", value=date.today(), key="txn_end")
     
     if txns:
-        # Flatten the object for display
-        clean_data = []
-        for t in txns:
-            clean_data.append({
-                "Date": t['date'],
-                "Merchant": t['merchant'],
-                "Amount": t['amount'],
-                "Category": t['categories']['name'] if t['categories'] else "None",
-                "Account": t['accounts']['name'] if t['accounts'] else "Unknown",
-                "Description": t['description']
-            })
-        
-        st.dataframe(
-            pd.DataFrame(clean_data),
-            use_container_width=True,
-            hide_index=True
+        grid_key = f"txn_grid_{filter_key}_{page_no}"
+        original = to_grid(data_service, txns)
+        edited = st.data_editor(
+            original,
+            width="stretch",
+            hide_index=True,
+            num_rows="delete",
+            column_config={
+                "Date": st.column_config.DateColumn(required=True),
+                "Amount": st.column_config.NumberColumn(format="$%.2f", step=0.01, required=True),
+                "Category": st.column_config.SelectboxColumn(options=list(cat_ids)),
+                "Account": st.column_config.SelectboxColumn(options=list(acct_ids), required=True),
+            },
+            key=grid_key
         )
+
+        # Edits and deletions are collected across the grid and saved together
+        updates, deleted = diff_grid(original, edited)
+        if updates or deleted:
+            by_id = {t['id']: t for t in txns}
+            col_save, col_discard, col_summary = st.columns([1, 1, 2])
+            with col_summary:
+                st.caption(f"{len(updates)} edited, {len(deleted)} deleted — not saved yet")
+            with col_discard:
+                if st.button("Discard changes"):
+                    del st.session_state[grid_key]
+                    st.rerun()
+            with col_save:
+                if st.button("Save changes", type="primary"):
+                    try:
+                        rows = []
+                        for txn_id, changes in updates.items():
+                            row = dict(by_id[txn_id])
+                            for col, value in changes.items():
+                                if col == "Category":
+                                    row['category_id'] = cat_ids.get(value)
+                                elif col == "Account":
+                                    row['account_id'] = acct_ids[value]
+                                elif col == "Date":
+                                    row['date'] = pd.Timestamp(value).date()
+                                else:
+                                    row[col.lower()] = value
+                            rows.append(row)
+                        data_service.bulk_update_transactions(rows)
+                        data_service.bulk_delete_transactions(deleted)
+                        # Receipt images (thumbnail and kept original included) go with their rows
+                        StorageService().remove_receipts(by_id[txn_id].get('receipt_path') for txn_id in deleted)
+                        del st.session_state[grid_key]
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error saving changes: {e}")
+
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("← Newer", disabled=page_no == 1):
+                cursors.pop()
+                st.rerun()
+        with col_page:
+            st.caption(f"Page {page_no}")
+        with col_next:
+            if st.button("Older →", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
+    elif search:
+        st.info(f'No transactions matching "{search}" in this period.')
     else:
         st.info("No transactions found in this period.")
 
-    st.divider()
+GRID_COLUMNS = ["Date", "Merchant", "Amount", "Category", "Account", "Description"]
 
-    # --- Manage Transactions ---
-    if txns:
-        with st.expander("Manage Transactions (Edit / Delete)"):
-            # Select transaction to manage by description/date/amount
-            # A bit tricky to select comfortably. Let's make a selectbox format string
-            txn_opts = {f"{t['date']} | {t['merchant']} | ${t['amount']}": t for t in txns}
-            selected_txn_str = st.selectbox("Select Transaction", list(txn_opts.keys()))
-            
-            if selected_txn_str:
-                selected_txn = txn_opts[selected_txn_str]
-                st.write(f"**Selected:** {selected_txn['description']}")
-                
-                with st.form("edit_txn_form"):
-                    new_desc = st.text_input("Description", value=selected_txn['description'] or "")
-                    new_merch = st.text_input("Merchant", value=selected_txn['merchant'] or "")
-                    new_amt = st.number_input("Amount", value=float(abs(selected_txn['amount'])), step=0.01)
-                    
-                    # Update & Delete
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        if st.form_submit_button("Update Transaction"):
-                            # If Expense/Income sign logic needed? Assuming keeping same sign for now simplicity
-                            # Or we can ask user. For MVP, assume sign is preserved based on existing.
-                            original_sign = -1 if float(selected_txn['amount']) < 0 else 1
-                            final_amt = new_amt * original_sign
-                            
-                            try:
-                                data_service.update_transaction(
-                                    selected_txn['id'],
-                                    description=new_desc,
-                                    merchant=new_merch,
-                                    amount=final_amt
-                                    # date, category left as is for simplicity
-                                )
-                                st.success("Updated!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Error: {e}")
-                    
-                    with c2:
-                         if st.form_submit_button("Delete Transaction", type="primary"):
-                             try:
-                                 data_service.delete_transaction(selected_txn['id'])
-                                 st.warning("Deleted!")
-                                 st.rerun()
-                             except Exception as e:
-                                 st.error(f"Error: {e}")
+def to_grid(data_service, txns):
+    """Editable frame of one page of transactions, indexed by id."""
+    df = data_service.to_transactions_frame(txns)
+    return pd.DataFrame({
+        "Date": df["date"].dt.date,
+        "Merchant": df["merchant"].astype(object),
+        "Amount": df["amount"],
+        # Plain values so the selectbox columns accept any option
+        "Category": df["category"].astype(object).where(df["category_id"].notna(), None),
+        "Account": df["account"].astype(object),
+        "Description": df["description"],
+    }, columns=GRID_COLUMNS).set_index(df["id"])
+
+def diff_grid(original, edited):
+    """({id: {column: new value}}, [deleted ids]) between two grid frames."""
+    def same(a, b):
+        return (pd.isna(a) and pd.isna(b)) if (pd.isna(a) or pd.isna(b)) else a == b
+
+    deleted = [txn_id for txn_id in original.index if txn_id not in edited.index]
+    updates = {}
+    for txn_id, row in edited.iterrows():
+        before = original.loc[txn_id]
+        changes = {col: (None if pd.isna(row[col]) else row[col])
+                   for col in GRID_COLUMNS if not same(before[col], row[col])}
+        if changes:
+            updates[txn_id] = changes
+    return updates, deleted
 
 if __name__ == "__main__":
     show()
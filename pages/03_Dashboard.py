@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from services.data_service import DataService
+from services.recurring_service import RecurringService
 from datetime import date, timedelta
 from utils.ui import setup_sidebar
+from utils.charts import MAX_BARS, downsample_minmax, pick_bucket
 
 def show():
     setup_sidebar()
@@ -17,20 +18,30 @@ def show():
     with col2:
         end_date = st.date_input("End Date", value=date.today())
 
-    txns = ds.get_transactions(start_date=start_date, end_date=end_date)
+    # The trend bucket and recurring toggle are drawn further down; read their
+    # state now so everything can be fetched in parallel. "auto" keeps the bar
+    # count readable whatever the range.
+    bucket = st.session_state.get("dash_bucket", "auto")
+    if bucket == "auto":
+        bucket = pick_bucket(start_date, end_date)
+    calls = dict(
+        kpis=lambda: ds.get_dashboard_kpis(start_date, end_date),
+        cat_totals=lambda: ds.get_category_totals(start_date, end_date),
+        period=lambda: ds.get_period_totals(start_date, end_date, bucket)
+    )
+    if st.session_state.get("dash_recurring"):
+        calls['recurring'] = lambda: RecurringService(ds).detect(end_date)
+    loaded = ds.fetch_concurrently(**calls)
+    kpis = loaded['kpis']
     
-    if not txns:
+    if not kpis['txn_count']:
         st.info("No data available for this period.")
         return
 
-    df = pd.DataFrame(txns)
-    # Ensure amount is numeric (it comes as string from Supabase usually if using Decimal)
-    df['amount'] = pd.to_numeric(df['amount'])
-    
     # KPI Cards
-    income = df[df['amount'] > 0]['amount'].sum()
-    expenses = df[df['amount'] < 0]['amount'].sum()
-    net = income + expenses
+    income = kpis['income']
+    expenses = kpis['expenses']
+    net = kpis['net']
     
     kpi1, kpi2, kpi3 = st.columns(3)
     kpi1.metric("Income", f"${income:,.2f}")
@@ -39,26 +50,63 @@ def show():
     
     st.divider()
 
-    # Charts
+    # Charts (plotly is imported on first use; it is slow to load and not needed above)
+    import plotly.express as px
     c1, c2 = st.columns(2)
     
     with c1:
         st.subheader("Spending by Category")
-        expense_df = df[df['amount'] < 0].copy()
-        if not expense_df.empty:
-            expense_df['abs_amount'] = expense_df['amount'].abs()
-            expense_df['category_name'] = expense_df['categories'].apply(lambda x: x['name'] if x else 'Uncategorized')
+        cat_totals = loaded['cat_totals']
+        if cat_totals:
+            expense_df = pd.DataFrame(cat_totals)
+            expense_df['total'] = pd.to_numeric(expense_df['total'])
             
-            fig_pie = px.pie(expense_df, values='abs_amount', names='category_name', hole=0.4)
+            fig_pie = px.pie(expense_df, values='total', names='category_name', hole=0.4)
             st.plotly_chart(fig_pie, use_container_width=True)
         else:
             st.text("No expenses to show.")
 
     with c2:
-        st.subheader("Daily Trend")
-        daily = df.groupby('date')['amount'].sum().reset_index()
-        fig_bar = px.bar(daily, x='date', y='amount', color='amount')
-        st.plotly_chart(fig_bar, use_container_width=True)
+        st.subheader("Trend")
+        st.radio("Group by", ("auto",) + ds.PERIOD_BUCKETS, horizontal=True, format_func=str.title, key="dash_bucket")
+        period = pd.DataFrame(loaded['period'])
+        if not period.empty:
+            period['net'] = pd.to_numeric(period['net'])
+            period['period_start'] = pd.to_datetime(period['period_start'])
+            if len(period) > MAX_BARS:
+                # Thousands of SVG bars stall the browser: draw a WebGL line that
+                # keeps every span's highs and lows instead
+                fig_trend = px.line(downsample_minmax(period, 'net'), x='period_start', y='net', render_mode='webgl')
+            else:
+                fig_trend = px.bar(period, x='period_start', y='net', color='net')
+            st.caption(f"Per {bucket}")
+            st.plotly_chart(fig_trend, width="stretch")
+
+    # Subscriptions and other recurring charges, detected over the full history
+    st.divider()
+    st.subheader("Recurring Charges")
+    # Opt-in: a cold model (first visit, or after history was edited) reads the whole ledger
+    st.toggle("Detect recurring charges", key="dash_recurring",
+              help="Scans your full transaction history for subscriptions and other repeating charges.")
+    if 'recurring' not in loaded:
+        return
+    recurring = loaded['recurring']
+    subscriptions = recurring[recurring['active'] & (recurring['amount'] < 0)]
+    if subscriptions.empty:
+        st.text("No recurring charges detected yet.")
+    else:
+        st.metric("Estimated Monthly Cost", f"${abs(subscriptions['monthly_cost'].sum()):,.2f}")
+        st.dataframe(
+            subscriptions[["merchant", "cadence", "amount", "next_date", "monthly_cost", "category", "account"]],
+            width="stretch",
+            hide_index=True,
+            column_config={
+                "cadence": st.column_config.TextColumn("Cadence"),
+                "amount": st.column_config.NumberColumn("Amount", format="$%.2f"),
+                "next_date": st.column_config.DateColumn("Next Expected"),
+                "monthly_cost": st.column_config.NumberColumn("Per Month", format="$%.2f"),
+            }
+        )
 
 if __name__ == "__main__":
     show()
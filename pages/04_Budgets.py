@@ -3,36 +3,54 @@ from services.data_service import DataService
 import pandas as pd
 from datetime import date
 from utils.ui import setup_sidebar
+from utils.periods import BUDGET_PERIODS, DEFAULT_WINDOW_DAYS, period_label
+
+# Past windows shown per budget alongside the current one
+HISTORY_WINDOWS = 3
 
 def show():
     setup_sidebar()
     st.title("Budgets 🎯")
     ds = DataService()
+
+    # All three reads are independent; run them together
+    loaded = ds.fetch_concurrently(
+        cats=lambda: ds.get_categories(type="expense"),
+        budgets=ds.get_budgets,
+        status=lambda: ds.get_budget_status(date.today(), history=HISTORY_WINDOWS)
+    )
     
     # 1. Create Budget
     with st.expander("Set New Budget"):
         with st.form("budget_form"):
-            cats = ds.get_categories(type="expense")
+            cats = loaded["cats"]
             cat_map = {c['name']: c['id'] for c in cats}
             
             c_name = st.selectbox("Category", list(cat_map.keys()))
-            limit = st.number_input("Monthly Limit ($)", min_value=1.0)
+            col_p, col_w = st.columns(2)
+            with col_p:
+                period = st.selectbox("Period", BUDGET_PERIODS, index=BUDGET_PERIODS.index("monthly"),
+                                      format_func=str.title)
+            with col_w:
+                window_days = st.number_input("Window (days)", min_value=1, value=DEFAULT_WINDOW_DAYS,
+                                              help="Only used for rolling budgets.")
+            limit = st.number_input("Limit ($)", min_value=1.0)
             
             if st.form_submit_button("Set Budget"):
                 try:
-                    ds.create_budget(cat_map[c_name], limit)
+                    ds.create_budget(cat_map[c_name], limit, period=period, window_days=int(window_days))
                     st.success(f"Budget set for {c_name}!")
                     st.rerun()
                 except Exception as e:
                     if "duplicate key" in str(e) or "23505" in str(e):
-                        st.warning(f"A budget for {c_name} already exists. Please update it in the list below.")
+                        st.warning(f"A {period} budget for {c_name} already exists. Please update it in the list below.")
                     else:
                         st.error(f"Error: {e}")
     
     # 2. Manage Budgets (Edit / Delete)
     st.divider()
     st.write("### Your Budgets")
-    budgets = ds.get_budgets()
+    budgets = loaded["budgets"]
     
     if budgets:
          
@@ -41,9 +59,10 @@ def show():
              c_name = b['categories']['name'] if b['categories'] else "Unknown"
              b_id = b['id']
              
-             with st.expander(f"{c_name}: ${b['amount_limit']}", expanded=False):
+             label = period_label(b.get('period') or 'monthly', b.get('window_days'))
+             with st.expander(f"{c_name} ({label}): ${b['amount_limit']}", expanded=False):
                  with st.form(f"edit_budget_{b_id}"):
-                     new_limit = st.number_input("Monthly Limit ($)", value=float(b['amount_limit']), min_value=1.0, key=f"lim_{b_id}")
+                     new_limit = st.number_input("Limit ($)", value=float(b['amount_limit']), min_value=1.0, key=f"lim_{b_id}")
                      
                      c1, c2 = st.columns(2)
                      with c1:
@@ -67,54 +86,48 @@ def show():
 
     st.divider()
     
-    # 2. View Progress
-    # Mock for now until DB method added
-    st.write("### Monthly Progress")
-    
-    # Fetch actual spend
-    start = date.today().replace(day=1)
-    txns = ds.get_transactions(start_date=start)
-    df = pd.DataFrame(txns)
+    # 3. View Progress
+    st.write("### Progress")
     
-    if not df.empty:
-        df['amount'] = pd.to_numeric(df['amount'])
-        expenses = df[df['amount'] < 0].copy()
-        expenses['cat_name'] = expenses['categories'].apply(lambda x: x['name'] if x else 'Uncategorized')
-        
-        spend_by_cat = expenses.groupby('cat_name')['amount'].sum().abs()
-        
-        # Visualize
-        # Create a map of category -> limit from the fetched budgets
-        budget_map = {}
-        if budgets:
-            for b in budgets:
-                c_name = b['categories']['name'] if b['categories'] else "Unknown"
-                budget_map[c_name] = float(b['amount_limit'])
+    # Every budget's current and past windows come back from one grouped query
+    status = pd.DataFrame(loaded["status"])
+    if status.empty:
+        st.info("No spending data yet.")
+        return
 
-        # Visualize only budgeted categories (to match "Your Budgets" list)
-        # We could also show unbudgeted spending separately, but for consistency let's filter.
-        
-        has_budgeted_spend = False
-        for cat, spent in spend_by_cat.items():
-            if cat in budget_map:
-                has_budgeted_spend = True
-                limit = budget_map[cat]
-                st.write(f"**{cat}**")
-                col_bar, col_val = st.columns([3, 1])
-                progress = min(spent / limit, 1.0)
-                # Color bar red if over budget
-                color = "red" if spent > limit else "green"
-                # Streamlit progress doesn't support color directly in simple API, but we can customize if needed.
-                # For now just standard blue/theme.
-                col_bar.progress(progress)
-                col_val.write(f"${spent:.0f} / ${limit:.0f}")
-        
-        if not has_budgeted_spend:
-            st.info("No spending recorded for your active budgets yet.")
-            
-        # Optional: Show unbudgeted spending logic could go here
+    status['spent'] = pd.to_numeric(status['spent'])
+    status['amount_limit'] = pd.to_numeric(status['amount_limit'])
+    current = status[(status['window_index'] == 0) & (status['spent'] > 0)]
+    
+    if not current.empty:
+        for p in current.to_dict("records"):
+            cat = p['category_name'] or "Unknown"
+            spent = p['spent']
+            limit = p['amount_limit']
+            st.write(f"**{cat}** · {period_label(p['period'], p['window_days'])}")
+            col_bar, col_val = st.columns([3, 1])
+            progress = min(spent / limit, 1.0)
+            # Streamlit progress doesn't support color directly in simple API, but we can customize if needed.
+            # For now just standard blue/theme.
+            col_bar.progress(progress, text=f"{p['window_start']} – {p['window_end']}")
+            col_val.write(f"${spent:.0f} / ${limit:.0f}")
     else:
-        st.info("No spending data this month.")
+        st.info("No spending recorded for your active budgets yet.")
+
+    with st.expander("Previous Periods"):
+        past = status[status['window_index'] > 0].copy()
+        past['budget'] = past['category_name'].fillna("Unknown") + " (" + past['period'] + ")"
+        past['used'] = past['spent'] / past['amount_limit']
+        st.dataframe(
+            past[['budget', 'window_start', 'window_end', 'spent', 'amount_limit', 'used']],
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "spent": st.column_config.NumberColumn("Spent", format="$%.2f"),
+                "amount_limit": st.column_config.NumberColumn("Limit", format="$%.2f"),
+                "used": st.column_config.ProgressColumn("Used", min_value=0.0, max_value=1.0)
+            }
+        )
 
 if __name__ == "__main__":
     show()
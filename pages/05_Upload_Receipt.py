@@ -2,7 +2,9 @@ import streamlit as st
 from services.storage_service import StorageService
 from services.ocr_service import OCRService
 from services.data_service import DataService
+from services.category_service import CategoryClassifier
 from datetime import date
+import pandas as pd
 import uuid
 from utils.ui import setup_sidebar
 
@@ -14,7 +16,31 @@ def show():
     storage = StorageService()
     ocr = OCRService()
     data_service = DataService()
-    
+
+    # Reference data for the save forms, fetched in parallel
+    refs = data_service.fetch_concurrently(
+        accounts=data_service.get_accounts,
+        categories=data_service.get_categories
+    )
+
+    mode = st.radio("Mode", ["Single Receipt", "Batch"], horizontal=True)
+    keep_original = st.checkbox("Keep the original image too",
+                                help="Receipts are stored downscaled; this also saves the untouched upload.")
+    if mode == "Batch":
+        show_batch(storage, ocr, data_service, refs["accounts"], refs["categories"], keep_original)
+    else:
+        show_single(storage, ocr, data_service, refs["accounts"], refs["categories"], keep_original)
+
+def apply_known_categories(data_service, results, cats):
+    """Replaces the LLM's category guess with the user's own category for merchants seen before."""
+    names = {c['id']: c['name'] for c in cats}
+    # Receipts are saved as expenses, so only expense categories can match
+    expense_ids = [c['id'] for c in cats if c['type'] == 'expense']
+    predicted = CategoryClassifier(data_service).predict_many([(r or {}).get("merchant") for r in results], expense_ids)
+    return [{**r, "category": names[cat_id]} if r and cat_id in names else r
+            for r, cat_id in zip(results, predicted)]
+
+def show_single(storage, ocr, data_service, accounts, cats, keep_original=False):
     uploaded_file = st.file_uploader("Upload Receipt Image", type=['png', 'jpg', 'jpeg'])
     
     if "ocr_result" not in st.session_state:
@@ -30,7 +56,7 @@ def show():
                 with st.spinner("Analyzing receipt..."):
                     result = ocr.parse_receipt(uploaded_file)
                     if result:
-                        st.session_state.ocr_result = result
+                        st.session_state.ocr_result = apply_known_categories(data_service, [result], cats)[0]
                         st.success("Data Extracted!")
                     else:
                         st.error("Could not extract data.")
@@ -59,11 +85,9 @@ def show():
 
         with col_b:
             # Account & Category Logic
-            accounts = data_service.get_accounts()
             acct_names = [a['name'] for a in accounts] if accounts else []
             account_choice = st.selectbox("Account", acct_names)
             
-            cats = data_service.get_categories()
             cat_names = [c['name'] for c in cats] if cats else ["Uncategorized"]
             
             # Try to match OCR category
@@ -87,7 +111,7 @@ def show():
                 user_id = st.session_state.user.id
                 ext = uploaded_file.name.split('.')[-1]
                 filename = f"{uuid.uuid4()}.{ext}"
-                path = storage.upload_receipt(uploaded_file, filename, user_id)
+                path = storage.upload_receipt(uploaded_file, filename, user_id, keep_original=keep_original)
                 
                 # 2. Save Transaction
                 # Need IDs
@@ -117,5 +141,112 @@ def show():
             except Exception as e:
                 st.error(f"Save failed: {e}")
 
+def show_batch(storage, ocr, data_service, accounts, cats, keep_original=False):
+    uploaded_files = st.file_uploader("Upload Receipt Images", type=['png', 'jpg', 'jpeg'],
+                                      accept_multiple_files=True)
+
+    if "batch_ocr" not in st.session_state:
+        st.session_state.batch_ocr = None
+
+    if not uploaded_files:
+        st.session_state.batch_ocr = None
+        return
+
+    if st.button(f"✨ Extract Data from {len(uploaded_files)} Receipts (AI)"):
+        progress = st.progress(0.0, text="Analyzing receipts...")
+        results = ocr.parse_receipts(
+            uploaded_files,
+            on_progress=lambda done, total: progress.progress(done / total, text=f"Analyzed {done} of {total}")
+        )
+        progress.empty()
+        known = apply_known_categories(data_service, [r for r, _ in results], cats)
+        results = [(r, err) for r, (_, err) in zip(known, results)]
+        st.session_state.batch_ocr = {
+            "files": [f.file_id for f in uploaded_files],
+            "results": results
+        }
+
+    batch = st.session_state.batch_ocr
+    if not batch or batch["files"] != [f.file_id for f in uploaded_files]:
+        return
+
+    failed = [f.name for f, (_, err) in zip(uploaded_files, batch["results"]) if err]
+    if failed:
+        st.warning(f"Could not extract {len(failed)} receipt(s): {', '.join(failed)}")
+
+    if not accounts:
+        st.warning("Please create an Account first!")
+        return
+    acct_names = [a['name'] for a in accounts]
+    cat_names = [c['name'] for c in cats]
+
+    # --- Review Table ---
+    st.subheader("Review & Save")
+    rows = []
+    for f, (result, _) in zip(uploaded_files, batch["results"]):
+        result = result or {}
+        try:
+            d_val = date.fromisoformat(result.get("date"))
+        except (TypeError, ValueError):
+            d_val = date.today()
+        try:
+            amount = abs(float(result.get("amount") or 0))
+        except (TypeError, ValueError):
+            amount = 0.0
+        rows.append({
+            "Save": bool(result),
+            "File": f.name,
+            "Merchant": result.get("merchant", ""),
+            "Date": d_val,
+            "Amount": amount,
+            "Category": result.get("category") if result.get("category") in cat_names else None,
+            "Account": acct_names[0]
+        })
+
+    edited = st.data_editor(
+        pd.DataFrame(rows),
+        hide_index=True,
+        width="stretch",
+        disabled=["File"],
+        column_config={
+            "Amount": st.column_config.NumberColumn(min_value=0.0, step=0.01, format="$%.2f", required=True),
+            "Date": st.column_config.DateColumn(required=True),
+            "Category": st.column_config.SelectboxColumn(options=cat_names),
+            "Account": st.column_config.SelectboxColumn(options=acct_names, required=True)
+        },
+        key="batch_review"
+    )
+
+    if st.button("Save Selected Transactions & Receipts", type="primary"):
+        acct_ids = {a['name']: a['id'] for a in accounts}
+        cat_ids = {c['name']: c['id'] for c in cats}
+        user_id = st.session_state.user.id
+        selected = [(f, row) for f, row in zip(uploaded_files, edited.to_dict("records")) if row["Save"]]
+        # Checked before anything is uploaded, so a bad row can't stop the batch halfway
+        incomplete = [row["File"] for _, row in selected
+                      if pd.isna(row["Date"]) or pd.isna(row["Amount"]) or not row["Account"]]
+        if incomplete:
+            st.error(f"Fill in the date, amount and account for: {', '.join(incomplete)}")
+            return
+        to_save = []
+        try:
+            for f, row in selected:
+                ext = f.name.split('.')[-1]
+                path = storage.upload_receipt(f, f"{uuid.uuid4()}.{ext}", user_id, keep_original=keep_original)
+                to_save.append({
+                    "account_id": acct_ids[row["Account"]],
+                    "date": pd.Timestamp(row["Date"]).date(),
+                    "amount": -abs(float(row["Amount"])),  # Expense usually
+                    "category_id": cat_ids.get(row["Category"]),
+                    "description": "Receipt Scan",
+                    "merchant": row["Merchant"],
+                    "receipt_path": path
+                })
+            saved = data_service.bulk_create_transactions(to_save)
+            st.success(f"Saved {saved} transactions!")
+            st.session_state.batch_ocr = None
+        except Exception as e:
+            st.error(f"Save failed: {e}")
+
 if __name__ == "__main__":
     show()
@@ -0,0 +1,93 @@
+import streamlit as st
+from services.data_service import DataService
+from services.import_service import ImportService
+from services.category_service import CategoryClassifier
+from utils.ui import setup_sidebar
+
+def show():
+    setup_sidebar()
+    st.title("Import Statement 📥")
+
+    data_service = DataService()
+    accounts = data_service.get_accounts()
+    categories = data_service.get_categories()
+
+    if not accounts:
+        st.warning("Please create an Account first!")
+        return
+
+    uploaded_file = st.file_uploader("Bank Statement", type=['csv', 'ofx', 'qfx'])
+    if not uploaded_file:
+        st.info("Upload a CSV export or an OFX/QFX file from your bank.")
+        return
+
+    importer = ImportService(accounts, categories)
+    account_map = {acc['name']: acc['id'] for acc in accounts}
+    is_ofx = uploaded_file.name.lower().endswith(('.ofx', '.qfx'))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        account_name = st.selectbox("Import into Account", list(account_map.keys()),
+                                    help="Used for every row unless an Account column is mapped below.")
+    with col2:
+        flip_sign = st.checkbox("Expenses are positive in this file",
+                                help="Some banks export debits as positive numbers; tick to negate every amount.")
+
+    mapping = {}
+    date_format = None
+    if not is_ofx:
+        # --- Column Mapping ---
+        try:
+            preview = importer.preview_csv(uploaded_file)
+        except Exception as e:
+            st.error(f"Could not read CSV: {e}")
+            return
+
+        st.subheader("Preview")
+        st.dataframe(preview, width="stretch", hide_index=True)
+
+        st.subheader("Map Columns")
+        columns = list(preview.columns)
+        options = ["(none)"] + columns
+        map_cols = st.columns(3)
+        for i, field in enumerate(ImportService.FIELDS):
+            # Pre-select a column whose header looks like the field
+            guess = ImportService.guess_column(field, columns)
+            with map_cols[i % 3]:
+                choice = st.selectbox(field.title(), options,
+                                      index=options.index(guess) if guess else 0, key=f"map_{field}")
+            mapping[field] = None if choice == "(none)" else choice
+
+        date_format = st.text_input("Date format (optional)", placeholder="e.g. %m/%d/%Y") or None
+
+    if st.button("Import Transactions", type="primary"):
+        missing = [f for f in ImportService.REQUIRED_FIELDS if not is_ofx and not mapping.get(f)]
+        if missing:
+            st.error(f"Map a column for: {', '.join(missing)}")
+            return
+
+        stats = {}
+        if is_ofx:
+            rows = importer.iter_ofx(uploaded_file, account_map[account_name], flip_sign, stats=stats)
+        else:
+            rows = importer.iter_csv(uploaded_file, mapping, account_map[account_name], flip_sign,
+                                     date_format=date_format, stats=stats)
+        # Rows without a (known) category get the one their merchant usually has,
+        # among the categories matching the row's sign (expense or income)
+        rows = CategoryClassifier(data_service).fill_categories(rows, categories)
+
+        status = st.empty()
+        try:
+            with st.spinner("Importing..."):
+                inserted = data_service.bulk_create_transactions(
+                    rows, on_progress=lambda n: status.caption(f"Imported {n:,} rows...")
+                )
+            status.empty()
+            st.success(f"Imported {inserted:,} transactions.")
+            if stats.get("skipped"):
+                st.warning(f"Skipped {stats['skipped']:,} rows with a missing date, amount or account.")
+        except Exception as e:
+            st.error(f"Import failed: {e}")
+
+if __name__ == "__main__":
+    show()
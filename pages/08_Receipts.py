@@ -0,0 +1,78 @@
+import streamlit as st
+from services.data_service import DataService
+from services.storage_service import StorageService
+from utils.ui import setup_sidebar
+
+PAGE_SIZE = 24
+COLUMNS = 4
+
+@st.dialog("Receipt", width="large")
+def show_receipt(storage, txn):
+    # Only the full image is fetched here, on demand; the original is signed in the
+    # same request and only exists when it was kept at upload
+    original = storage.original_path(txn['receipt_path'])
+    urls = storage.get_signed_urls([txn['receipt_path'], original])
+    url = urls.get(txn['receipt_path'])
+    if url:
+        st.image(url, width="stretch")
+    else:
+        st.error("Could not load the receipt image.")
+    if urls.get(original):
+        st.link_button("Open original image", urls[original])
+    st.caption(f"{txn['date']} · {txn.get('merchant') or 'Unknown merchant'} · ${abs(float(txn['amount'])):,.2f}")
+
+def show():
+    setup_sidebar()
+    st.title("Receipt Gallery 🖼️")
+
+    data_service = DataService()
+    storage = StorageService()
+
+    # Keyset paging, as on the Transactions page
+    if "receipt_page_cursors" not in st.session_state:
+        st.session_state.receipt_page_cursors = [None]
+    cursors = st.session_state.receipt_page_cursors
+    page_no = len(cursors)
+
+    try:
+        txns, next_cursor = data_service.get_transactions_page(
+            after=cursors[-1], page_size=PAGE_SIZE, with_receipt=True
+        )
+    except Exception as e:
+        st.error(f"Error fetching receipts: {e}")
+        return
+
+    if not txns:
+        st.info("No receipts yet. Scan one on the Upload Receipt page!")
+        return
+
+    # One signing request for the whole page of thumbnails
+    thumb_paths = {t['id']: storage.thumbnail_path(t['receipt_path']) for t in txns}
+    thumbs = storage.get_signed_urls(list(thumb_paths.values()))
+
+    grid = st.columns(COLUMNS)
+    for i, txn in enumerate(txns):
+        with grid[i % COLUMNS]:
+            thumb = thumbs.get(thumb_paths[txn['id']])
+            if thumb:
+                st.image(thumb, width="stretch")
+            else:
+                st.caption("🧾 No preview")
+            st.caption(f"{txn['date']} · {txn.get('merchant') or '—'} · ${abs(float(txn['amount'])):,.2f}")
+            if st.button("View", key=f"receipt_view_{txn['id']}"):
+                show_receipt(storage, txn)
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("← Newer", disabled=page_no == 1):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {page_no}")
+    with col_next:
+        if st.button("Older →", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+if __name__ == "__main__":
+    show()
@@ -84,3 +84,500 @@ WITH CHECK (auth.uid() = user_id);
 -- Policies for 'receipts' bucket:
 -- CREATE POLICY "View own receipts" ON storage.objects FOR SELECT USING ( bucket_id = 'receipts' AND auth.uid()::text = (storage.foldername(name))[1] );
 -- CREATE POLICY "Upload own receipts" ON storage.objects FOR INSERT WITH CHECK ( bucket_id = 'receipts' AND auth.uid()::text = (storage.foldername(name))[1] );
+
+-- 7. Dashboard Aggregates
+-- Invoker-rights functions so RLS still scopes every row to auth.uid().
+CREATE OR REPLACE FUNCTION public.dashboard_kpis(p_start DATE, p_end DATE)
+RETURNS TABLE (income NUMERIC, expenses NUMERIC, net NUMERIC, txn_count BIGINT)
+LANGUAGE sql STABLE AS $$
+  SELECT
+    COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0),
+    COALESCE(SUM(amount) FILTER (WHERE amount < 0), 0),
+    COALESCE(SUM(amount), 0),
+    COUNT(*)
+  FROM public.transactions
+  WHERE user_id = auth.uid() AND date BETWEEN p_start AND p_end;
+$$;
+
+CREATE OR REPLACE FUNCTION public.dashboard_category_totals(p_start DATE, p_end DATE)
+RETURNS TABLE (category_id UUID, category_name TEXT, color TEXT, total NUMERIC)
+LANGUAGE sql STABLE AS $$
+  SELECT t.category_id, COALESCE(c.name, 'Uncategorized'), c.color, -SUM(t.amount)
+  FROM public.transactions t
+  LEFT JOIN public.categories c ON c.id = t.category_id
+  WHERE t.user_id = auth.uid() AND t.amount < 0 AND t.date BETWEEN p_start AND p_end
+  GROUP BY t.category_id, c.name, c.color
+  ORDER BY 4 DESC;
+$$;
+
+CREATE OR REPLACE FUNCTION public.dashboard_period_totals(p_start DATE, p_end DATE, p_bucket TEXT DEFAULT 'day')
+RETURNS TABLE (period_start DATE, income NUMERIC, expenses NUMERIC, net NUMERIC)
+LANGUAGE sql STABLE AS $$
+  SELECT
+    date_trunc(p_bucket, date)::date,
+    COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0),
+    COALESCE(SUM(amount) FILTER (WHERE amount < 0), 0),
+    SUM(amount)
+  FROM public.transactions
+  WHERE user_id = auth.uid() AND date BETWEEN p_start AND p_end
+  GROUP BY 1
+  ORDER BY 1;
+$$;
+
+-- 8. Account Balance Maintenance
+-- Statement-level triggers fold every inserted/updated/deleted transaction into
+-- one `balance = balance + delta` per account. The update is atomic under the
+-- row lock, so concurrent writes can't lose each other's changes.
+CREATE OR REPLACE FUNCTION public.sync_account_balances()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.accounts a SET balance = a.balance + d.delta
+    FROM (
+      SELECT account_id, SUM(amount) AS delta FROM new_rows
+      WHERE account_id IS NOT NULL GROUP BY account_id
+    ) d
+    WHERE a.id = d.account_id;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE public.accounts a SET balance = a.balance - d.delta
+    FROM (
+      SELECT account_id, SUM(amount) AS delta FROM old_rows
+      WHERE account_id IS NOT NULL GROUP BY account_id
+    ) d
+    WHERE a.id = d.account_id;
+  ELSE
+    UPDATE public.accounts a SET balance = a.balance + d.delta
+    FROM (
+      SELECT account_id, SUM(amount) AS delta FROM (
+        SELECT account_id, amount FROM new_rows
+        UNION ALL
+        SELECT account_id, -amount FROM old_rows
+      ) moved
+      WHERE account_id IS NOT NULL GROUP BY account_id
+      HAVING SUM(amount) <> 0
+    ) d
+    WHERE a.id = d.account_id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_transactions_balance_insert
+AFTER INSERT ON public.transactions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_account_balances();
+
+CREATE TRIGGER trg_transactions_balance_update
+AFTER UPDATE ON public.transactions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_account_balances();
+
+CREATE TRIGGER trg_transactions_balance_delete
+AFTER DELETE ON public.transactions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_account_balances();
+
+-- 9. Sync Metadata (for the local offline replica)
+-- updated_at is the incremental-sync watermark; deletes leave a tombstone so
+-- replicas can drop rows they already hold.
+ALTER TABLE public.accounts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE public.categories ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE public.transactions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE public.budgets ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS idx_accounts_user_updated ON public.accounts(user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_categories_user_updated ON public.categories(user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_updated ON public.transactions(user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_budgets_user_updated ON public.budgets(user_id, updated_at, id);
+
+CREATE OR REPLACE FUNCTION public.touch_updated_at()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER trg_accounts_touch BEFORE UPDATE ON public.accounts
+FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at();
+CREATE TRIGGER trg_categories_touch BEFORE UPDATE ON public.categories
+FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at();
+CREATE TRIGGER trg_transactions_touch BEFORE UPDATE ON public.transactions
+FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at();
+CREATE TRIGGER trg_budgets_touch BEFORE UPDATE ON public.budgets
+FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at();
+
+CREATE TABLE public.sync_tombstones (
+  id BIGSERIAL PRIMARY KEY,
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+  table_name TEXT NOT NULL,
+  row_id UUID NOT NULL,
+  deleted_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+CREATE INDEX idx_sync_tombstones_user_deleted ON public.sync_tombstones(user_id, deleted_at);
+ALTER TABLE public.sync_tombstones ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read their own tombstones" ON public.sync_tombstones
+FOR SELECT USING (auth.uid() = user_id);
+
+-- Definer rights: users can't insert tombstones directly, only via deletes
+CREATE OR REPLACE FUNCTION public.record_tombstone()
+RETURNS TRIGGER LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+  INSERT INTO public.sync_tombstones (user_id, table_name, row_id)
+  VALUES (OLD.user_id, TG_TABLE_NAME, OLD.id);
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_accounts_tombstone AFTER DELETE ON public.accounts
+FOR EACH ROW EXECUTE FUNCTION public.record_tombstone();
+CREATE TRIGGER trg_categories_tombstone AFTER DELETE ON public.categories
+FOR EACH ROW EXECUTE FUNCTION public.record_tombstone();
+CREATE TRIGGER trg_transactions_tombstone AFTER DELETE ON public.transactions
+FOR EACH ROW EXECUTE FUNCTION public.record_tombstone();
+CREATE TRIGGER trg_budgets_tombstone AFTER DELETE ON public.budgets
+FOR EACH ROW EXECUTE FUNCTION public.record_tombstone();
+
+-- 10. Monthly Spend Rollup (for budget progress)
+-- Expense totals per (user, category, month), kept current by statement-level
+-- triggers so budget status never has to scan transactions.
+CREATE TABLE public.budget_spend_rollup (
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+  category_id UUID REFERENCES public.categories(id) ON DELETE CASCADE NOT NULL,
+  period_start DATE NOT NULL,
+  spent NUMERIC(14,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, category_id, period_start)
+);
+ALTER TABLE public.budget_spend_rollup ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can manage their own spend rollup" ON public.budget_spend_rollup
+USING (auth.uid() = user_id)
+WITH CHECK (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION public.sync_budget_spend_rollup()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  -- Expenses are negative amounts; the rollup stores spend as a positive number.
+  -- Each branch folds the statement's rows into one signed delta per rollup key.
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO public.budget_spend_rollup AS r (user_id, category_id, period_start, spent)
+    SELECT user_id, category_id, date_trunc('month', date)::date, -SUM(amount)
+    FROM new_rows
+    WHERE amount < 0 AND category_id IS NOT NULL
+    GROUP BY 1, 2, 3
+    ON CONFLICT (user_id, category_id, period_start)
+    DO UPDATE SET spent = r.spent + EXCLUDED.spent;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE public.budget_spend_rollup r SET spent = r.spent + d.delta
+    FROM (
+      SELECT user_id, category_id, date_trunc('month', date)::date AS period_start, SUM(amount) AS delta
+      FROM old_rows
+      WHERE amount < 0 AND category_id IS NOT NULL
+      GROUP BY 1, 2, 3
+    ) d
+    WHERE r.user_id = d.user_id AND r.category_id = d.category_id AND r.period_start = d.period_start;
+  ELSE
+    INSERT INTO public.budget_spend_rollup AS r (user_id, category_id, period_start, spent)
+    SELECT user_id, category_id, date_trunc('month', date)::date, SUM(spend)
+    FROM (
+      SELECT user_id, category_id, date, -amount AS spend FROM new_rows WHERE amount < 0
+      UNION ALL
+      SELECT user_id, category_id, date, amount FROM old_rows WHERE amount < 0
+    ) moved
+    -- A category being deleted nulls its transactions; its rollup rows cascade away
+    WHERE category_id IS NOT NULL
+      AND EXISTS (SELECT 1 FROM public.categories c WHERE c.id = moved.category_id)
+    GROUP BY 1, 2, 3
+    HAVING SUM(spend) <> 0
+    ON CONFLICT (user_id, category_id, period_start)
+    DO UPDATE SET spent = r.spent + EXCLUDED.spent;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_transactions_rollup_insert
+AFTER INSERT ON public.transactions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_budget_spend_rollup();
+
+CREATE TRIGGER trg_transactions_rollup_update
+AFTER UPDATE ON public.transactions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_budget_spend_rollup();
+
+CREATE TRIGGER trg_transactions_rollup_delete
+AFTER DELETE ON public.transactions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_budget_spend_rollup();
+
+-- Backfill from existing history (safe to run once after creating the triggers)
+INSERT INTO public.budget_spend_rollup (user_id, category_id, period_start, spent)
+SELECT user_id, category_id, date_trunc('month', date)::date, -SUM(amount)
+FROM public.transactions
+WHERE amount < 0 AND category_id IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT DO NOTHING;
+
+-- One row per budget with this month's spend: O(budgets), not O(transactions)
+CREATE OR REPLACE FUNCTION public.budget_progress(p_period_start DATE)
+RETURNS TABLE (
+  budget_id UUID, category_id UUID, category_name TEXT,
+  amount_limit NUMERIC, period TEXT, spent NUMERIC
+)
+LANGUAGE sql STABLE AS $$
+  SELECT b.id, b.category_id, c.name, b.amount_limit, b.period, COALESCE(r.spent, 0)
+  FROM public.budgets b
+  LEFT JOIN public.categories c ON c.id = b.category_id
+  LEFT JOIN public.budget_spend_rollup r
+    ON r.user_id = b.user_id AND r.category_id = b.category_id
+   AND r.period_start = date_trunc('month', p_period_start)::date
+  WHERE b.user_id = auth.uid()
+  ORDER BY c.name;
+$$;
+
+-- 11. Budget Periods
+-- Budgets may be weekly, monthly, quarterly, yearly, or a rolling window of
+-- `window_days` ending today.
+ALTER TABLE public.budgets ADD COLUMN IF NOT EXISTS window_days INTEGER CHECK (window_days > 0);
+ALTER TABLE public.budgets ADD CONSTRAINT budgets_period_check
+  CHECK (period IN ('weekly', 'monthly', 'quarterly', 'yearly', 'rolling'));
+CREATE INDEX IF NOT EXISTS idx_transactions_user_category_date
+  ON public.transactions(user_id, category_id, date);
+
+-- Spend for every budget in its current window and the `p_history` windows
+-- before it, in one query. Month-aligned periods sum the monthly rollup;
+-- weekly and rolling windows probe transactions by (user, category, date).
+CREATE OR REPLACE FUNCTION public.budget_status(p_as_of DATE, p_history INT DEFAULT 0)
+RETURNS TABLE (
+  budget_id UUID, category_id UUID, category_name TEXT, amount_limit NUMERIC,
+  period TEXT, window_days INT, window_index INT, window_start DATE, window_end DATE, spent NUMERIC
+)
+LANGUAGE sql STABLE AS $$
+  WITH windows AS (
+    SELECT b.*, g.idx,
+      CASE WHEN b.period = 'rolling'
+        THEN p_as_of - COALESCE(b.window_days, 30) * (g.idx + 1) + 1
+        ELSE (date_trunc(u.unit, p_as_of) - u.step * g.idx)::date
+      END AS w_start,
+      CASE WHEN b.period = 'rolling'
+        THEN p_as_of - COALESCE(b.window_days, 30) * g.idx
+        ELSE (date_trunc(u.unit, p_as_of) - u.step * (g.idx - 1))::date - 1
+      END AS w_end
+    FROM public.budgets b
+    CROSS JOIN LATERAL (
+      SELECT
+        CASE b.period WHEN 'weekly' THEN 'week' WHEN 'quarterly' THEN 'quarter'
+                      WHEN 'yearly' THEN 'year' ELSE 'month' END AS unit,
+        CASE b.period WHEN 'weekly' THEN interval '1 week' WHEN 'quarterly' THEN interval '3 months'
+                      WHEN 'yearly' THEN interval '1 year' ELSE interval '1 month' END AS step
+    ) u
+    CROSS JOIN generate_series(0, p_history) AS g(idx)
+    WHERE b.user_id = auth.uid()
+  )
+  SELECT w.id, w.category_id, c.name, w.amount_limit, w.period, w.window_days,
+         w.idx, w.w_start, w.w_end,
+         COALESCE(CASE WHEN w.period IN ('monthly', 'quarterly', 'yearly')
+           THEN (SELECT SUM(r.spent) FROM public.budget_spend_rollup r
+                 WHERE r.user_id = w.user_id AND r.category_id = w.category_id
+                   AND r.period_start BETWEEN w.w_start AND w.w_end)
+           ELSE (SELECT -SUM(t.amount) FROM public.transactions t
+                 WHERE t.user_id = w.user_id AND t.category_id = w.category_id
+                   AND t.amount < 0 AND t.date BETWEEN w.w_start AND w.w_end)
+         END, 0)
+  FROM windows w
+  LEFT JOIN public.categories c ON c.id = w.category_id
+  ORDER BY c.name, w.period, w.idx;
+$$;
+
+-- budget_progress now reports each budget's own current window, whatever its period
+CREATE OR REPLACE FUNCTION public.budget_progress(p_period_start DATE)
+RETURNS TABLE (
+  budget_id UUID, category_id UUID, category_name TEXT,
+  amount_limit NUMERIC, period TEXT, spent NUMERIC
+)
+LANGUAGE sql STABLE AS $$
+  SELECT s.budget_id, s.category_id, s.category_name, s.amount_limit, s.period, s.spent
+  FROM public.budget_status(p_period_start, 0) s;
+$$;
+
+-- 12. Receipt Gallery
+-- Pages of receipts newest first; thumbnails live at {user_id}/thumbs/ in the bucket.
+CREATE INDEX IF NOT EXISTS idx_transactions_user_receipts
+  ON public.transactions(user_id, date DESC, id DESC) WHERE receipt_path IS NOT NULL;
+
+-- 13. Transaction Search
+-- Substring search over merchant and description (ILIKE '%term%'). btree_gin
+-- lets the RLS user_id filter live in the same GIN index as the trigrams.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+CREATE INDEX IF NOT EXISTS idx_transactions_merchant_trgm
+  ON public.transactions USING gin (user_id, merchant gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_transactions_description_trgm
+  ON public.transactions USING gin (user_id, description gin_trgm_ops);
+
+-- 14. Balance Checkpoints
+-- Closing balance per account at the end of every month with activity and of
+-- the month before it. Any day's balance is the nearest earlier checkpoint plus
+-- the transactions since (see DataService.get_balance_history).
+CREATE TABLE public.account_balance_checkpoints (
+  account_id UUID REFERENCES public.accounts(id) ON DELETE CASCADE NOT NULL,
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+  month_end DATE NOT NULL,
+  balance NUMERIC(14,2) NOT NULL,
+  PRIMARY KEY (account_id, month_end)
+);
+ALTER TABLE public.account_balance_checkpoints ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can manage their own balance checkpoints" ON public.account_balance_checkpoints
+USING (auth.uid() = user_id)
+WITH CHECK (auth.uid() = user_id);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON public.transactions(account_id, date);
+
+-- `p_moved` is a JSON array of {account_id, date, amount} signed balance changes.
+CREATE OR REPLACE FUNCTION public.apply_balance_checkpoint_deltas(p_moved JSONB)
+RETURNS VOID LANGUAGE sql AS $$
+  -- Existing checkpoints on or after a change's date absorb it
+  UPDATE public.account_balance_checkpoints c SET balance = c.balance + d.delta
+  FROM (
+    SELECT c2.account_id, c2.month_end, SUM(m.amount) AS delta
+    FROM jsonb_to_recordset(p_moved) AS m(account_id UUID, date DATE, amount NUMERIC)
+    JOIN public.account_balance_checkpoints c2
+      ON c2.account_id = m.account_id AND c2.month_end >= m.date
+    GROUP BY 1, 2
+    HAVING SUM(m.amount) <> 0
+  ) d
+  WHERE c.account_id = d.account_id AND c.month_end = d.month_end;
+
+  -- Month ends that get their first checkpoint are computed from the account's
+  -- already-updated balance minus everything dated after them
+  INSERT INTO public.account_balance_checkpoints (account_id, user_id, month_end, balance)
+  SELECT a.id, a.user_id, k.month_end,
+         a.balance - COALESCE((SELECT SUM(t.amount) FROM public.transactions t
+                               WHERE t.account_id = a.id AND t.date > k.month_end), 0)
+  FROM (
+    SELECT DISTINCT m.account_id, (date_trunc('month', m.date) + s.shift - interval '1 day')::date AS month_end
+    FROM jsonb_to_recordset(p_moved) AS m(account_id UUID, date DATE)
+    CROSS JOIN (VALUES (interval '0 months'), (interval '1 month')) AS s(shift)
+  ) k
+  JOIN public.accounts a ON a.id = k.account_id
+  ON CONFLICT (account_id, month_end) DO NOTHING;
+$$;
+
+-- Runs after trg_transactions_balance_* (triggers fire in name order), so
+-- accounts.balance already includes the statement's changes.
+CREATE OR REPLACE FUNCTION public.sync_balance_checkpoints()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.apply_balance_checkpoint_deltas((
+      SELECT jsonb_agg(jsonb_build_object('account_id', account_id, 'date', date, 'amount', amount))
+      FROM new_rows WHERE account_id IS NOT NULL
+    ));
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.apply_balance_checkpoint_deltas((
+      SELECT jsonb_agg(jsonb_build_object('account_id', account_id, 'date', date, 'amount', -amount))
+      FROM old_rows WHERE account_id IS NOT NULL
+    ));
+  ELSE
+    PERFORM public.apply_balance_checkpoint_deltas((
+      SELECT jsonb_agg(jsonb_build_object('account_id', account_id, 'date', date, 'amount', amount))
+      FROM (
+        SELECT account_id, date, amount FROM new_rows
+        UNION ALL
+        SELECT account_id, date, -amount FROM old_rows
+      ) moved
+      WHERE account_id IS NOT NULL
+    ));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_transactions_checkpoint_insert
+AFTER INSERT ON public.transactions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_balance_checkpoints();
+
+CREATE TRIGGER trg_transactions_checkpoint_update
+AFTER UPDATE ON public.transactions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_balance_checkpoints();
+
+CREATE TRIGGER trg_transactions_checkpoint_delete
+AFTER DELETE ON public.transactions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.sync_balance_checkpoints();
+
+-- A balance edited by hand (not by the transaction triggers, which run nested)
+-- shifts the account's whole history by the same amount
+CREATE OR REPLACE FUNCTION public.shift_balance_checkpoints()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  IF pg_trigger_depth() = 1 AND NEW.balance IS DISTINCT FROM OLD.balance THEN
+    UPDATE public.account_balance_checkpoints
+    SET balance = balance + (NEW.balance - OLD.balance)
+    WHERE account_id = NEW.id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_accounts_checkpoint_shift
+AFTER UPDATE OF balance ON public.accounts
+FOR EACH ROW EXECUTE FUNCTION public.shift_balance_checkpoints();
+
+-- Net change per day after `p_after`, in date order; callers page by passing
+-- the last date they received as the next `p_after`.
+CREATE OR REPLACE FUNCTION public.account_daily_net(p_account_id UUID, p_after DATE, p_end DATE, p_limit INT DEFAULT 1000)
+RETURNS TABLE (date DATE, net NUMERIC)
+LANGUAGE sql STABLE AS $$
+  SELECT t.date, SUM(t.amount)
+  FROM public.transactions t
+  WHERE t.account_id = p_account_id AND t.date > p_after AND t.date <= p_end
+  GROUP BY t.date
+  ORDER BY t.date
+  LIMIT p_limit;
+$$;
+
+-- Backfill from existing history (safe to run once after creating the triggers)
+INSERT INTO public.account_balance_checkpoints (account_id, user_id, month_end, balance)
+SELECT a.id, a.user_id, k.month_end,
+       a.balance - COALESCE((SELECT SUM(t.amount) FROM public.transactions t
+                             WHERE t.account_id = a.id AND t.date > k.month_end), 0)
+FROM (
+  SELECT DISTINCT t.account_id, (date_trunc('month', t.date) + s.shift - interval '1 day')::date AS month_end
+  FROM public.transactions t
+  CROSS JOIN (VALUES (interval '0 months'), (interval '1 month')) AS s(shift)
+  WHERE t.account_id IS NOT NULL
+) k
+JOIN public.accounts a ON a.id = k.account_id
+ON CONFLICT DO NOTHING;
+
+-- 15. Batched Transaction Edits
+-- Applies edited rows (a JSON array of complete writable rows, keyed by id) in one
+-- UPDATE, so the balance triggers net all changes per account. Ids that no longer
+-- exist, e.g. deleted in another session, are skipped rather than re-inserted;
+-- RLS limits the update to the caller's rows. Returns the number of rows updated.
+CREATE OR REPLACE FUNCTION public.update_transactions(p_rows JSONB)
+RETURNS INTEGER LANGUAGE sql AS $$
+  WITH updated AS (
+    UPDATE public.transactions t SET
+      account_id = r.account_id, date = r.date, amount = r.amount, category_id = r.category_id,
+      description = r.description, merchant = r.merchant, receipt_path = r.receipt_path, status = r.status
+    FROM jsonb_populate_recordset(NULL::public.transactions, p_rows) r
+    WHERE t.id = r.id
+    RETURNING t.id
+  )
+  SELECT COUNT(*)::INTEGER FROM updated;
+$$;
+
+-- 16. Keyset Paging Index
+-- History pages are ordered by (date, id); an index ending in id serves each page
+-- as a range scan. Replaces idx_transactions_user_date from section 4 on existing
+-- databases as well as new ones.
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date_id
+  ON public.transactions(user_id, date DESC, id DESC);
+DROP INDEX IF EXISTS public.idx_transactions_user_date;
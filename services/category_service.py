@@ -0,0 +1,110 @@
+import difflib
+import pandas as pd
+from services.incremental import IncrementalModel
+from utils.cache import TTLCache
+from utils.merchants import normalize_merchant, normalize_merchants
+
+class CategoryClassifier(IncrementalModel):
+    """Suggests a category for a merchant from how the user categorized it before.
+
+    The model counts transactions per (normalized merchant, category_id);
+    a merchant maps to its most frequent category. Unknown names fall back to
+    a known merchant that prefixes them ("amazon mktp" -> "amazon") and then
+    to the closest spelling, so only new merchants need the LLM's guess.
+    """
+
+    MIN_CONFIDENCE = 0.6  # share of the merchant's transactions in its top category
+    FUZZY_CUTOFF = 0.85   # difflib similarity for a misspelled / truncated name
+
+    _state = TTLCache(maxsize=256, ttl=6 * 3600)
+
+    def _scan(self, frame, model):
+        rows = pd.DataFrame({
+            "merchant_key": normalize_merchants(frame["merchant"]),
+            "category_id": frame["category_id"],
+        })
+        rows = rows[(rows["merchant_key"] != "") & rows["category_id"].notna()]
+        counts = rows.groupby(["merchant_key", "category_id"]).size()
+        if model is not None:
+            counts = pd.concat([model["counts"], counts]).groupby(level=[0, 1]).sum()
+        return self._index(counts)
+
+    def _index(self, counts):
+        # Top category per merchant, kept only when it clearly dominates
+        totals = counts.groupby(level=0).sum()
+        top = counts.sort_values(ascending=False, kind="stable").groupby(level=0).head(1)
+        share = top / totals.reindex(top.index.get_level_values(0)).to_numpy()
+        confident = share[share >= self.MIN_CONFIDENCE]
+        best = dict(zip(confident.index.get_level_values(0), confident.index.get_level_values(1)))
+        return {"counts": counts, "best": best, "keys": sorted(best), "restricted": {}}
+
+    def _restrict(self, model, category_ids):
+        """The model over only `category_ids` (e.g. the expense categories), built once per set."""
+        category_ids = frozenset(category_ids)
+        if category_ids not in model["restricted"]:
+            counts = model["counts"]
+            model["restricted"][category_ids] = self._index(
+                counts[counts.index.get_level_values(1).isin(category_ids)]
+            )
+        return model["restricted"][category_ids]
+
+    def predict(self, merchant: str, category_ids=None):
+        """category_id for `merchant`, or None when there is no confident match.
+
+        `category_ids` limits the answer to those categories (e.g. the ones matching
+        the transaction's income/expense type).
+        """
+        return self.predict_many([merchant], category_ids)[0]
+
+    def predict_many(self, merchants, category_ids=None):
+        """predict() for each merchant, building the model once."""
+        model = self._model()
+        if model and category_ids is not None:
+            model = self._restrict(model, category_ids)
+        return self._predict(merchants, model)
+
+    def _predict(self, merchants, model, found=None):
+        """`found` memoizes matches by normalized name across calls."""
+        if not model or not model["best"]:
+            return [None] * len(merchants)
+        found = {} if found is None else found
+        out = []
+        for merchant in merchants:
+            key = normalize_merchant(merchant)
+            if key not in found:
+                found[key] = self._lookup(key, model) if key else None
+            out.append(found[key])
+        return out
+
+    def fill_categories(self, rows, categories=None):
+        """Yields `rows` (dicts with merchant / amount / category_id), filling in missing category_ids.
+
+        With `categories` (dicts with id and type), expenses only get expense
+        categories and income only income ones. Consumes `rows` lazily, so it
+        can wrap a streaming import.
+        """
+        base, models = None, {}  # category type -> (model, matches found so far)
+        for row in rows:
+            if not row.get("category_id") and row.get("merchant"):
+                kind = None if categories is None else ("expense" if row["amount"] < 0 else "income")
+                if kind not in models:
+                    if base is None:
+                        base = self._model() or {}
+                    model = base
+                    if base and kind is not None:
+                        model = self._restrict(base, [c['id'] for c in categories if c['type'] == kind])
+                    models[kind] = (model, {})
+                row["category_id"] = self._predict([row["merchant"]], *models[kind])[0]
+            yield row
+
+    def _lookup(self, key, model):
+        best = model["best"]
+        if key in best:
+            return best[key]
+        words = key.split()
+        for i in range(len(words) - 1, 0, -1):
+            prefix = " ".join(words[:i])
+            if prefix in best:
+                return best[prefix]
+        close = difflib.get_close_matches(key, model["keys"], n=1, cutoff=self.FUZZY_CUTOFF)
+        return best[close[0]] if close else None
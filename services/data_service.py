@@ -1,22 +1,135 @@
 from services.supabase_client import SupabaseClient
+from services.replica_service import LocalReplica
+from services.recurring_service import RecurringService
+from services.category_service import CategoryClassifier
+from utils.cache import TTLCache
+from utils.periods import BUDGET_PERIODS, DEFAULT_WINDOW_DAYS
+from utils import metrics
+from postgrest import ReturnMethod
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import httpx
 import pandas as pd
 import streamlit as st
-from datetime import date
+from datetime import date, timedelta
 
+@metrics.trace_methods
 class DataService:
+    # Shared across reruns and sessions; keys start with the user id so users never see each other's rows.
+    # Callers must treat cached lists as read-only.
+    _cache = TTLCache(maxsize=256, ttl=60)
+
+    # Which cached reads a write to each table makes stale (joins and balances included)
+    _INVALIDATES = {
+        "accounts": ("accounts", "transactions"),
+        "categories": ("categories", "transactions", "budgets"),
+        "transactions": ("transactions", "accounts", "budgets"),
+        "budgets": ("budgets",)
+    }
+
     def __init__(self):
         self.supabase = SupabaseClient.get_instance()
+        self.replica = self._open_replica()
 
     def get_user_id(self):
         if "user" in st.session_state:
             return st.session_state.user.id
         return None
 
+    # --- Local Replica ---
+    def _open_replica(self):
+        """Returns the user's LocalReplica (synced if stale) when configured and enabled in the sidebar."""
+        user_id = self.get_user_id()
+        if not user_id or not st.session_state.get("use_replica") or not LocalReplica.directory():
+            return None
+        replica = LocalReplica.for_user(user_id)
+        try:
+            replica.sync_if_stale(self.supabase)
+        except Exception as e:
+            st.error(f"Replica sync failed: {e}")
+        return replica
+
+    def _write(self, table: str, op: str, data: dict = None, row_id: str = None):
+        """Sends one insert/update/delete by id. With the replica enabled, a write that
+        can't reach Supabase is applied locally and queued for the next sync."""
+        builder = self.supabase.table(table)
+        if op == "insert":
+            query = builder.insert(data)
+        elif op == "update":
+            query = builder.update(data).eq("id", row_id)
+        else:
+            query = builder.delete().eq("id", row_id)
+        try:
+            query.execute()
+        except httpx.TransportError:
+            if not self.replica:
+                raise
+            self.replica.queue_write(table, op, data, row_id)
+        self._invalidate(table, data.get("date") if op == "insert" and data else None)
+
+    # --- Cache ---
+    def _cached(self, namespace: str, params: tuple, loader):
+        user_id = self.get_user_id()
+        # Replica reads are local already; caching them would only serve stale copies
+        if not user_id or self.replica:
+            return loader()
+        key = (user_id, namespace, params)
+        value = self._cache.get(key)
+        if value is None:
+            value = loader()
+            self._cache.set(key, value)
+        else:
+            recorder = metrics.active()
+            if recorder:
+                recorder.record(namespace, "cache", rows=len(value) if isinstance(value, list) else 1, cache_hit=True)
+        return value
+
+    def _invalidate(self, table: str, earliest=None):
+        """`earliest` is the oldest date an insert added (None for other writes)."""
+        if self.replica:
+            # Pull server-side effects (e.g. balance triggers) on the next read
+            self.replica.last_sync = 0
+        user_id = self.get_user_id()
+        if user_id and table != "budgets":
+            # Models learned from history scan incrementally; they only survive inserts past their last scan
+            for model in (RecurringService, CategoryClassifier):
+                model.forget(user_id, earliest if table == "transactions" else None)
+        for namespace in self._INVALIDATES[table]:
+            if user_id:
+                self._cache.invalidate((user_id, namespace))
+            else:
+                self._cache.invalidate()
+
+    @classmethod
+    def cache_stats(cls):
+        return cls._cache.stats()
+
+    # --- Concurrent Loading ---
+    def fetch_concurrently(self, max_workers: int = None, **calls):
+        """Runs independent zero-argument read calls in parallel; returns results by name.
+
+        e.g. fetch_concurrently(accounts=ds.get_accounts, categories=ds.get_categories)
+        Page startup then waits only for the slowest query instead of their sum.
+        """
+        # Workers need the script context for session_state (user id) and st.error
+        ctx = get_script_run_ctx()
+
+        def run(fn):
+            if ctx:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            return fn()
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(calls) or 1) as pool:
+            futures = {name: pool.submit(run, fn) for name, fn in calls.items()}
+            return {name: future.result() for name, future in futures.items()}
+
     # --- Accounts ---
     def get_accounts(self):
         try:
-            response = self.supabase.table("accounts").select("*").execute()
-            return response.data
+            if self.replica:
+                return self.replica.accounts()
+            return self._cached("accounts", (), lambda: self.supabase.table("accounts").select("*").execute().data)
         except Exception as e:
             st.error(f"Error fetching accounts: {e}")
             return []
@@ -33,7 +146,7 @@ class DataService:
             "balance": balance
         }
         try:
-            self.supabase.table("accounts").insert(data).execute()
+            self._write("accounts", "insert", data)
         except Exception as e:
             raise e
 
@@ -44,24 +157,86 @@ class DataService:
                 "type": type,
                 "balance": balance
             }
-             self.supabase.table("accounts").update(data).eq("id", account_id).execute()
+             self._write("accounts", "update", data, account_id)
         except Exception as e:
             raise e
 
     def delete_account(self, account_id: str):
         try:
-            self.supabase.table("accounts").delete().eq("id", account_id).execute()
+            self._write("accounts", "delete", row_id=account_id)
         except Exception as e:
             raise e
 
+    # Rows per account_daily_net call (PostgREST caps responses at 1000)
+    DAILY_NET_PAGE = 1000
+
+    def get_balance_history(self, account_id: str, start_date: date, end_date: date):
+        """Daily closing balance of an account as a DataFrame (date, balance).
+
+        Starts from the month-end checkpoint just before `start_date` (schema.sql
+        section 14), so only that month's days and the range itself are read.
+        """
+        try:
+            return self._cached("accounts", ("balance_history", account_id, start_date, end_date),
+                                lambda: self._load_balance_history(account_id, start_date, end_date))
+        except Exception as e:
+            st.error(f"Error fetching balance history: {e}")
+            return pd.DataFrame(columns=["date", "balance"])
+
+    def _load_balance_history(self, account_id, start_date, end_date):
+        if self.replica:
+            base_date = start_date - timedelta(days=1)
+            base = self.replica.balance_at(account_id, base_date)
+            daily = self.replica.daily_net(account_id, base_date, end_date)
+        else:
+            checkpoints = self.supabase.table("account_balance_checkpoints").select("month_end, balance") \
+                .eq("account_id", account_id).lt("month_end", start_date.isoformat()) \
+                .order("month_end", desc=True).limit(1).execute().data
+            if not checkpoints:
+                # Nothing before the range: the earliest checkpoint precedes all activity
+                checkpoints = self.supabase.table("account_balance_checkpoints").select("month_end, balance") \
+                    .eq("account_id", account_id).order("month_end").limit(1).execute().data
+            if checkpoints:
+                base_date = date.fromisoformat(checkpoints[0]["month_end"])
+                base = float(checkpoints[0]["balance"])
+                daily = []
+                after = base_date
+                while True:
+                    rows = self.supabase.rpc("account_daily_net", {
+                        "p_account_id": account_id,
+                        "p_after": after.isoformat(),
+                        "p_end": end_date.isoformat(),
+                        "p_limit": self.DAILY_NET_PAGE
+                    }).execute().data
+                    daily += rows
+                    if len(rows) < self.DAILY_NET_PAGE:
+                        break
+                    after = date.fromisoformat(rows[-1]["date"])
+            else:
+                # No transactions at all: the balance has always been what it is now
+                account = self.supabase.table("accounts").select("balance").eq("id", account_id).execute().data
+                base_date = start_date
+                base = float(account[0]["balance"]) if account else 0.0
+                daily = []
+
+        days = pd.date_range(min(start_date, base_date), end_date, freq="D")
+        net = pd.Series({pd.Timestamp(r["date"]): float(r["net"]) for r in daily}, dtype="float64")
+        balance = base + net.reindex(days, fill_value=0.0).cumsum()
+        frame = pd.DataFrame({"date": days, "balance": balance.round(2).values})
+        return frame[frame["date"] >= pd.Timestamp(start_date)].reset_index(drop=True)
+
     # --- Categories ---
     def get_categories(self, type=None):
         try:
-            query = self.supabase.table("categories").select("*")
-            if type:
-                query = query.eq("type", type)
-            response = query.execute()
-            return response.data
+            if self.replica:
+                return self.replica.categories(type)
+
+            def load():
+                query = self.supabase.table("categories").select("*")
+                if type:
+                    query = query.eq("type", type)
+                return query.execute().data
+            return self._cached("categories", (type,), load)
         except Exception as e:
             st.error(f"Error fetching categories: {e}")
             return []
@@ -78,29 +253,171 @@ class DataService:
             "color": color
         }
         try:
-            self.supabase.table("categories").insert(data).execute()
+            self._write("categories", "insert", data)
         except Exception as e:
              # Ignore unique constraint errors gracefully if needed, or re-raise
             raise e
 
     # --- Transactions ---
+    TRANSACTION_SELECT = "*, accounts(name), categories(name, color)"
+
+    @staticmethod
+    def _search_terms(text: str):
+        # Characters with meaning in PostgREST filters or LIKE patterns are dropped;
+        # "_" (LIKE's any-character) splits words instead, so foo_bar needs both foo and bar
+        cleaned = text.translate(str.maketrans("_", " ", '*%\\"'))
+        return tuple(dict.fromkeys(t.lower() for t in cleaned.split()))
+
+    def _transactions_query(self, start_date=None, end_date=None, with_receipt: bool = False,
+                            terms=(), account_id=None, category_id=None):
+        # Ordered to match idx_transactions_user_date_id so keyset pages are index scans
+        query = self.supabase.table("transactions").select(
+            self.TRANSACTION_SELECT
+        ).order("date", desc=True).order("id", desc=True)
+
+        if start_date:
+            query = query.gte("date", start_date.isoformat())
+        if end_date:
+            query = query.lte("date", end_date.isoformat())
+        if with_receipt:
+            query = query.not_.is_("receipt_path", "null")
+        if account_id:
+            query = query.eq("account_id", account_id)
+        if category_id:
+            query = query.eq("category_id", category_id)
+        for term in terms:
+            # Every term must appear in the merchant or description (trigram-indexed, see schema.sql)
+            query = query.or_(f'merchant.ilike."*{term}*",description.ilike."*{term}*"')
+        return query
+
+    def _fetch_transactions_page(self, start_date, end_date, after, page_size, **filters):
+        if self.replica:
+            rows = self.replica.transactions(start_date, end_date, after=after, limit=page_size + 1, **filters)
+        else:
+            query = self._transactions_query(start_date, end_date, **filters)
+            if after:
+                last_date, last_id = after
+                # Keyset on (date, id): strictly older than the last row we returned
+                query = query.or_(f"date.lt.{last_date},and(date.eq.{last_date},id.lt.{last_id})")
+
+            # Ask for one extra row to know whether another page exists
+            rows = query.limit(page_size + 1).execute().data
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            return rows, (rows[-1]['date'], rows[-1]['id'])
+        return rows, None
+
+    def get_transactions_page(self, start_date=None, end_date=None, after=None, page_size: int = 50,
+                              with_receipt: bool = False):
+        """Fetches one page of transactions, newest first.
+
+        `after` is the cursor returned for the previous page (None for the first page).
+        `with_receipt` keeps only transactions that have a receipt image.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        """
+        return self._cached(
+            "transactions", ("page", start_date, end_date, after, page_size, with_receipt),
+            lambda: self._fetch_transactions_page(start_date, end_date, after, page_size, with_receipt=with_receipt)
+        )
+
+    def search_transactions(self, query: str, filters: dict = None, page=None, page_size: int = 50):
+        """Finds transactions whose merchant or description contains every word of `query`.
+
+        `filters` may hold start_date, end_date, account_id and category_id; `page`
+        is the cursor returned with the previous page (None for the first).
+        Returns (rows, next_cursor), newest first, like get_transactions_page.
+        """
+        terms = self._search_terms(query)
+        filters = dict(filters or {})
+        start_date, end_date = filters.pop("start_date", None), filters.pop("end_date", None)
+        return self._cached(
+            "transactions", ("search", terms, start_date, end_date, tuple(sorted(filters.items())), page, page_size),
+            lambda: self._fetch_transactions_page(start_date, end_date, page, page_size, terms=terms, **filters)
+        )
+
+    def iter_transaction_pages(self, start_date=None, end_date=None, page_size: int = 500):
+        """Yields pages of transactions until the range is exhausted."""
+        # page_size + 1 must stay under the PostgREST max-rows cap (1000 on Supabase)
+        cursor = None
+        while True:
+            rows, cursor = self._fetch_transactions_page(start_date, end_date, cursor, page_size)
+            if rows:
+                yield rows
+            if cursor is None:
+                return
+
     def get_transactions(self, start_date=None, end_date=None):
         try:
-            query = self.supabase.table("transactions").select(
-                "*, accounts(name), categories(name, color)"
-            ).order("date", desc=True)
-            
-            if start_date:
-                query = query.gte("date", start_date.isoformat())
-            if end_date:
-                query = query.lte("date", end_date.isoformat())
-                
-            response = query.execute()
-            return response.data
+            return self._load_transactions(start_date, end_date)
         except Exception as e:
             st.error(f"Error fetching transactions: {e}")
             return []
 
+    def _load_transactions(self, start_date, end_date):
+        # Raises on failure, so callers caching a result derived from it cache nothing
+        if self.replica:
+            return self.replica.transactions(start_date, end_date)
+
+        # Walk every page so large ranges aren't truncated at the PostgREST row cap
+        def load():
+            txns = []
+            for page in self.iter_transaction_pages(start_date, end_date):
+                txns.extend(page)
+            return txns
+        return self._cached("transactions", ("all", start_date, end_date), load)
+
+    # Column order/dtypes of get_transactions_frame; stable even when there are no rows
+    FRAME_COLUMNS = {
+        "id": "object",
+        "date": "datetime64[ns]",
+        "amount": "float64",
+        "merchant": "category",
+        "description": "object",
+        "category": "category",
+        "category_color": "object",
+        "account": "category",
+        "category_id": "object",
+        "account_id": "object",
+        "receipt_path": "object",
+    }
+
+    @classmethod
+    def to_transactions_frame(cls, txns):
+        """Flattens transaction rows (with their joins) into a typed, columnar DataFrame.
+
+        Uncategorized rows get category "Uncategorized"; rows without an account get "Unknown".
+        """
+        empty = {}
+        cats = [t.get('categories') or empty for t in txns]
+        accts = [t.get('accounts') or empty for t in txns]
+        df = pd.DataFrame({
+            "id": [t['id'] for t in txns],
+            "date": pd.to_datetime([t['date'] for t in txns]),
+            # NUMERIC columns arrive as strings or numbers depending on the client
+            "amount": pd.to_numeric(pd.Series([t['amount'] for t in txns], dtype=object)).astype("float64"),
+            "merchant": [t.get('merchant') for t in txns],
+            "description": [t.get('description') for t in txns],
+            "category": [c.get('name', 'Uncategorized') for c in cats],
+            "category_color": [c.get('color') for c in cats],
+            "account": [a.get('name', 'Unknown') for a in accts],
+            "category_id": [t.get('category_id') for t in txns],
+            "account_id": [t.get('account_id') for t in txns],
+            "receipt_path": [t.get('receipt_path') for t in txns],
+        }, columns=list(cls.FRAME_COLUMNS))
+        return df.astype(cls.FRAME_COLUMNS)
+
+    def get_transactions_frame(self, start_date=None, end_date=None):
+        """Typed DataFrame of every transaction in range (see to_transactions_frame).
+
+        The frame is cached alongside the rows; treat it as read-only and .copy() before mutating.
+        """
+        try:
+            return self._cached("transactions", ("frame", start_date, end_date),
+                                lambda: self.to_transactions_frame(self._load_transactions(start_date, end_date)))
+        except Exception as e:
+            st.error(f"Error fetching transactions: {e}")
+            return self.to_transactions_frame([])
+
     def create_transaction(self, account_id: str, date_obj: date, amount: float, 
                            category_id: str, description: str, merchant: str, receipt_path: str = None):
         user_id = self.get_user_id()
@@ -118,32 +435,132 @@ class DataService:
             "receipt_path": receipt_path
         }
         try:
-            self.supabase.table("transactions").insert(data).execute()
-            # Optional: Update account balance trigger is better in DB, but for MVP we might need manual? 
-            # Actually, let's keep it simple. DB trigger would be ideal, but let's assume balance is calculated or manually adjusted for now. 
-            # Or we can update the account balance here.
-            # Let's do a quick Balance update for UX.
-            # Fetch current balance
-            acc = self.supabase.table("accounts").select("balance").eq("id", account_id).single().execute()
-            current_bal = float(acc.data['balance'])
-            new_bal = current_bal + amount # Amount is + for income, - for expense
-            self.supabase.table("accounts").update({"balance": new_bal}).eq("id", account_id).execute()
+            # Account balance is adjusted by the trg_transactions_balance_* triggers
+            self._write("transactions", "insert", data)
             
         except Exception as e:
             raise e
 
+    def bulk_create_transactions(self, rows, batch_size: int = 500, on_progress=None):
+        """Inserts transactions in batches of `batch_size` rows per request.
+
+        `rows` is any iterable of dicts with account_id, date (date or ISO string),
+        amount, category_id, description and merchant; it is consumed lazily so large
+        imports never sit in memory at once. The balance trigger runs once per batch,
+        applying a single adjustment per account. Returns the number of rows inserted.
+        """
+        user_id = self.get_user_id()
+        if not user_id:
+            raise Exception("User not authenticated")
+
+        inserted = 0
+        earliest = None
+        batch = []
+
+        def flush():
+            nonlocal inserted
+            self.supabase.table("transactions").insert(batch, returning=ReturnMethod.minimal).execute()
+            inserted += len(batch)
+            batch.clear()
+            if on_progress:
+                on_progress(inserted)
+
+        try:
+            for row in rows:
+                txn_date = row['date']
+                txn_date = txn_date.isoformat() if isinstance(txn_date, date) else txn_date
+                earliest = min(earliest or txn_date, txn_date)
+                batch.append({
+                    "user_id": user_id,
+                    "account_id": row['account_id'],
+                    "date": txn_date,
+                    "amount": row['amount'],
+                    "category_id": row.get('category_id'),
+                    "description": row.get('description'),
+                    "merchant": row.get('merchant'),
+                    "receipt_path": row.get('receipt_path')
+                })
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            # Even a partial import has changed the ledger
+            if inserted:
+                self._invalidate("transactions", earliest)
+        return inserted
+
     def create_transaction_with_receipt(self, **kwargs):
         """Alias for create_transaction to match calling code if needed"""
         return self.create_transaction(**kwargs)
 
     def delete_transaction(self, txn_id: str):
-        # Note: In a real app, deleting a txn should revert the balance change.
-        # For simplicity MVP, we'll skip the revert logic or add it if requested.
+        # The delete trigger reverts the balance change
         try:
-            self.supabase.table("transactions").delete().eq("id", txn_id).execute()
+            self._write("transactions", "delete", row_id=txn_id)
         except Exception as e:
              raise e
 
+    # Columns a client may write; joins and server-maintained timestamps are dropped
+    TRANSACTION_WRITABLE = ("id", "account_id", "date", "amount", "category_id", "description",
+                            "merchant", "receipt_path", "status")
+    DELETE_BATCH_SIZE = 100  # ids per request, keeping the in.(...) filter well under URL limits
+
+    def bulk_update_transactions(self, rows):
+        """Saves edited transactions in a single request (the update_transactions function).
+
+        `rows` are complete transaction rows, e.g. from get_transactions_page, with
+        the edits applied. Rows deleted meanwhile (e.g. in another session) are
+        skipped, never re-created. The balance trigger nets every change per account.
+        Returns the number of rows updated.
+        """
+        user_id = self.get_user_id()
+        if not user_id:
+            raise Exception("User not authenticated")
+
+        payload = []
+        for row in rows:
+            data = {col: row.get(col) for col in self.TRANSACTION_WRITABLE}
+            if isinstance(data["date"], date):
+                data["date"] = data["date"].isoformat()
+            payload.append(data)
+        if not payload:
+            return 0
+
+        try:
+            updated = self.supabase.rpc("update_transactions", {"p_rows": payload}).execute().data
+        except httpx.TransportError:
+            if not self.replica:
+                raise
+            # Queued as updates by id, which can't re-create a deleted row either
+            for data in payload:
+                self.replica.queue_write("transactions", "update", data, data["id"])
+            updated = len(payload)
+        self._invalidate("transactions")
+        return updated
+
+    def bulk_delete_transactions(self, txn_ids):
+        """Deletes transactions by id, DELETE_BATCH_SIZE per request. Returns the number deleted."""
+        txn_ids = list(txn_ids)
+        deleted = 0
+        try:
+            for i in range(0, len(txn_ids), self.DELETE_BATCH_SIZE):
+                batch = txn_ids[i:i + self.DELETE_BATCH_SIZE]
+                try:
+                    self.supabase.table("transactions").delete(
+                        returning=ReturnMethod.minimal
+                    ).in_("id", batch).execute()
+                except httpx.TransportError:
+                    if not self.replica:
+                        raise
+                    for txn_id in batch:
+                        self.replica.queue_write("transactions", "delete", row_id=txn_id)
+                deleted += len(batch)
+        finally:
+            if deleted:
+                self._invalidate("transactions")
+        return deleted
+
     def update_transaction(self, txn_id: str, description: str, merchant: str, amount: float = None, date_obj: date = None, category_id: str = None):
         try:
              data = {}
@@ -153,38 +570,118 @@ class DataService:
              if date_obj is not None: data['date'] = date_obj.isoformat()
              if category_id: data['category_id'] = category_id
              
-             self.supabase.table("transactions").update(data).eq("id", txn_id).execute()
+             self._write("transactions", "update", data, txn_id)
         except Exception as e:
             raise e
 
+    # --- Dashboard Aggregates ---
+    # Totals are computed by the dashboard_* functions in schema.sql so only
+    # a handful of rows cross the wire, however long the history is.
+    PERIOD_BUCKETS = ("day", "week", "month", "quarter")
+
+    def get_dashboard_kpis(self, start_date: date, end_date: date):
+        try:
+            if self.replica:
+                rows = self.replica.dashboard_kpis(start_date, end_date)
+            else:
+                rows = self._cached("transactions", ("kpis", start_date, end_date), lambda: self.supabase.rpc("dashboard_kpis", {
+                    "p_start": start_date.isoformat(),
+                    "p_end": end_date.isoformat()
+                }).execute().data)
+            kpis = rows[0] if rows else {}
+            return {
+                "income": float(kpis.get("income") or 0),
+                "expenses": float(kpis.get("expenses") or 0),
+                "net": float(kpis.get("net") or 0),
+                "txn_count": int(kpis.get("txn_count") or 0)
+            }
+        except Exception as e:
+            st.error(f"Error fetching dashboard totals: {e}")
+            return {"income": 0.0, "expenses": 0.0, "net": 0.0, "txn_count": 0}
+
+    def get_category_totals(self, start_date: date, end_date: date):
+        """Expense totals per category (positive numbers), largest first."""
+        try:
+            if self.replica:
+                return self.replica.dashboard_category_totals(start_date, end_date)
+            return self._cached("transactions", ("category_totals", start_date, end_date), lambda: self.supabase.rpc("dashboard_category_totals", {
+                "p_start": start_date.isoformat(),
+                "p_end": end_date.isoformat()
+            }).execute().data)
+        except Exception as e:
+            st.error(f"Error fetching category totals: {e}")
+            return []
+
+    def get_period_totals(self, start_date: date, end_date: date, bucket: str = "day"):
+        """Income/expense/net per day, week, month or quarter, oldest first."""
+        if bucket not in self.PERIOD_BUCKETS:
+            raise ValueError(f"bucket must be one of {self.PERIOD_BUCKETS}")
+        try:
+            if self.replica:
+                return self.replica.dashboard_period_totals(start_date, end_date, bucket)
+            return self._cached("transactions", ("period_totals", start_date, end_date, bucket), lambda: self.supabase.rpc("dashboard_period_totals", {
+                "p_start": start_date.isoformat(),
+                "p_end": end_date.isoformat(),
+                "p_bucket": bucket
+            }).execute().data)
+        except Exception as e:
+            st.error(f"Error fetching trend totals: {e}")
+            return []
+
     # --- Budgets ---
-    def create_budget(self, category_id: str, amount_limit: float, period: str = 'monthly'):
+    def create_budget(self, category_id: str, amount_limit: float, period: str = 'monthly', window_days: int = None):
         user_id = self.get_user_id()
         if not user_id: raise Exception("Auth required")
-        data = { "user_id": user_id, "category_id": category_id, "amount_limit": amount_limit, "period": period }
+        if period not in BUDGET_PERIODS:
+            raise ValueError(f"period must be one of {BUDGET_PERIODS}")
+        data = { "user_id": user_id, "category_id": category_id, "amount_limit": amount_limit, "period": period,
+                 "window_days": (window_days or DEFAULT_WINDOW_DAYS) if period == "rolling" else None }
         try:
-            self.supabase.table("budgets").insert(data).execute()
+            self._write("budgets", "insert", data)
         except Exception as e:
             raise e
 
     def get_budgets(self):
         try:
             # Join categories to get name
-            return self.supabase.table("budgets").select("*, categories(name)").execute().data
+            if self.replica:
+                return self.replica.budgets()
+            return self._cached("budgets", (), lambda: self.supabase.table("budgets").select("*, categories(name)").execute().data)
         except Exception as e:
             return []
 
 
 
+    def get_budget_status(self, as_of: date = None, history: int = 0):
+        """Spend for every budget in its current period window and the `history` windows before it.
+
+        One row per (budget, window) with window_index 0 for the current window; computed
+        in a single server query by the budget_status function, whatever the budgets' periods.
+        """
+        as_of = as_of or date.today()
+        try:
+            if self.replica:
+                return self.replica.budget_status(as_of, history)
+            return self._cached("budgets", ("status", as_of, history), lambda: self.supabase.rpc(
+                "budget_status", {"p_as_of": as_of.isoformat(), "p_history": history}
+            ).execute().data)
+        except Exception as e:
+            st.error(f"Error fetching budget progress: {e}")
+            return []
+
+    def get_budget_progress(self, as_of: date = None):
+        """Every budget with its spend so far in the window containing `as_of` (default: today)."""
+        return self.get_budget_status(as_of, history=0)
+
     def update_budget(self, budget_id: str, amount_limit: float):
         try:
-            self.supabase.table("budgets").update({"amount_limit": amount_limit}).eq("id", budget_id).execute()
+            self._write("budgets", "update", {"amount_limit": amount_limit}, budget_id)
         except Exception as e:
             raise e
 
     def delete_budget(self, budget_id: str):
         try:
-            self.supabase.table("budgets").delete().eq("id", budget_id).execute()
+            self._write("budgets", "delete", row_id=budget_id)
         except Exception as e:
             raise e
 
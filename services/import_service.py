@@ -0,0 +1,127 @@
+import re
+import pandas as pd
+from datetime import datetime
+
+class ImportService:
+    """Parses bank statements (CSV or OFX) into rows for DataService.bulk_create_transactions."""
+
+    CSV_CHUNK_ROWS = 5000
+    FIELDS = ["date", "amount", "merchant", "description", "category", "account"]
+    REQUIRED_FIELDS = ["date", "amount"]
+
+    # Header words naming an identifier ("Account Number", "Card #"), not the field's value
+    ID_WORDS = {"number", "num", "no", "id", "iban", "#"}
+
+    _OFX_TXN = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+    _OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+    _HEADER_WORD = re.compile(r"[a-z0-9#]+")
+
+    def __init__(self, accounts, categories):
+        # Resolve names to ids once per import, case-insensitively
+        self.account_map = {a['name'].strip().lower(): a['id'] for a in accounts}
+        self.category_map = {c['name'].strip().lower(): c['id'] for c in categories}
+
+    # --- CSV ---
+    @classmethod
+    def guess_column(cls, field: str, columns):
+        """The column whose header best matches `field`, or None.
+
+        An exact header wins, then one containing `field` as a whole word (fewest
+        other words first), then a plain substring hit. Headers naming an
+        identifier ("Account Number") are never guessed.
+        """
+        best, best_rank = None, None
+        for col in columns:
+            header = str(col).strip().lower()
+            words = cls._HEADER_WORD.findall(header)
+            if header == field:
+                rank = (0, 0)
+            elif cls.ID_WORDS & set(words):
+                continue
+            elif field in words:
+                rank = (1, len(words))
+            elif field in header:
+                rank = (2, len(words))
+            else:
+                continue
+            if best_rank is None or rank < best_rank:
+                best, best_rank = col, rank
+        return best
+
+    @staticmethod
+    def preview_csv(file, nrows: int = 10):
+        file.seek(0)
+        df = pd.read_csv(file, nrows=nrows, dtype=str)
+        file.seek(0)
+        return df
+
+    def iter_csv(self, file, mapping: dict, default_account_id: str, flip_sign: bool = False,
+                 date_format: str = None, stats: dict = None):
+        """Yields transaction dicts from a CSV, reading it in chunks.
+
+        `mapping` maps FIELDS to CSV column names (None to skip a field).
+        `date_format` is a strptime pattern; None lets pandas infer it from the first row.
+        Rows with an unparseable date or amount are skipped and counted in `stats`.
+        """
+        stats = stats if stats is not None else {}
+        stats.setdefault("skipped", 0)
+        usecols = [c for c in mapping.values() if c]
+
+        file.seek(0)
+        for chunk in pd.read_csv(file, usecols=usecols, dtype=str, chunksize=self.CSV_CHUNK_ROWS):
+            frame = pd.DataFrame({
+                "date": pd.to_datetime(chunk[mapping['date']], format=date_format, errors="coerce").dt.date,
+                "amount": self._parse_amounts(chunk[mapping['amount']])
+            })
+            if flip_sign:
+                frame['amount'] = -frame['amount']
+            for field in ("merchant", "description"):
+                frame[field] = chunk[mapping[field]].str.strip() if mapping.get(field) else None
+            frame['account_id'] = self._resolve(chunk, mapping.get('account'), self.account_map, default_account_id)
+            frame['category_id'] = self._resolve(chunk, mapping.get('category'), self.category_map, None)
+
+            valid = frame['date'].notna() & frame['amount'].notna() & frame['account_id'].notna()
+            stats["skipped"] += int((~valid).sum())
+            frame = frame[valid].astype(object).where(frame[valid].notna(), None)
+            yield from frame.to_dict("records")
+
+    @staticmethod
+    def _parse_amounts(col):
+        # "$1,234.56", "(12.00)" and "-12.00" are all common bank spellings
+        text = col.fillna("").str.replace(r"[$,\s]", "", regex=True)
+        negative = text.str.startswith("(") & text.str.endswith(")")
+        text = text.str.strip("()")
+        amounts = pd.to_numeric(text, errors="coerce").round(2)
+        return amounts.where(~negative, -amounts)
+
+    @staticmethod
+    def _resolve(chunk, column, name_map, default):
+        if not column:
+            return pd.Series(default, index=chunk.index, dtype=object)
+        ids = chunk[column].fillna("").str.strip().str.lower().map(name_map)
+        return ids.astype(object).where(ids.notna(), default)
+
+    # --- OFX ---
+    def iter_ofx(self, file, default_account_id: str, flip_sign: bool = False, stats: dict = None):
+        """Yields transaction dicts from an OFX/QFX statement (SGML or XML flavour)."""
+        stats = stats if stats is not None else {}
+        stats.setdefault("skipped", 0)
+
+        file.seek(0)
+        text = file.read().decode("utf-8", errors="replace")
+        for match in self._OFX_TXN.finditer(text):
+            fields = {k.upper(): v.strip() for k, v in self._OFX_FIELD.findall(match.group(1))}
+            try:
+                txn_date = datetime.strptime(fields["DTPOSTED"][:8], "%Y%m%d").date()
+                amount = round(float(fields["TRNAMT"].replace(",", ".")), 2)
+            except (KeyError, ValueError):
+                stats["skipped"] += 1
+                continue
+            yield {
+                "account_id": default_account_id,
+                "date": txn_date,
+                "amount": -amount if flip_sign else amount,
+                "category_id": None,
+                "merchant": fields.get("NAME") or fields.get("PAYEE"),
+                "description": fields.get("MEMO")
+            }
@@ -0,0 +1,55 @@
+import pandas as pd
+from utils.cache import TTLCache
+
+class IncrementalModel:
+    """Base for per-user models learned from the transaction history (see
+    RecurringService, CategoryClassifier).
+
+    Subclasses implement `_scan(frame, model)`, folding a transactions frame
+    (DataService.to_transactions_frame) into the model built so far (None on
+    a first run) and returning it. Each run only fetches transactions dated on
+    or after the previous one; DataService calls `forget` when a write changes
+    older history, and the state also expires so edits made elsewhere show up.
+    """
+
+    # Per-user scan state; each subclass declares its own
+    _state: TTLCache = None
+
+    def __init__(self, data_service):
+        self.ds = data_service
+
+    @classmethod
+    def forget(cls, user_id: str, earliest=None):
+        """Drops a user's model unless the change is an insert dated on or after the last scan.
+
+        `earliest` is the oldest date inserted; None (edits, deletes) always drops it.
+        """
+        state = cls._state.get((user_id,))
+        if state is not None and (earliest is None or pd.Timestamp(earliest) < state["watermark"]):
+            cls._state.invalidate((user_id,))
+
+    def _scan(self, frame, model):
+        raise NotImplementedError
+
+    def _model(self):
+        """The user's model, brought up to date with transactions added since the last run."""
+        user_id = self.ds.get_user_id()
+        state = self._state.get((user_id,)) if user_id else None
+        if state is None:
+            frame = self.ds.get_transactions_frame()
+            model, watermark, seen = None, None, frozenset()
+        else:
+            # Rows on the watermark date were scanned already unless they are new
+            frame = self.ds.get_transactions_frame(state["watermark"].date())
+            frame = frame[~frame["id"].isin(state["seen"])]
+            model, watermark, seen = state["model"], state["watermark"], state["seen"]
+
+        if not frame.empty:
+            model = self._scan(frame, model)
+            latest = frame["date"].max()
+            if watermark is None or latest > watermark:
+                watermark, seen = latest, frozenset()
+            seen = seen | frozenset(frame.loc[frame["date"] == watermark, "id"])
+        if user_id and watermark is not None:
+            self._state.set((user_id,), {"model": model, "watermark": watermark, "seen": seen})
+        return model
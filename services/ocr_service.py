@@ -1,45 +1,174 @@
-import google.generativeai as genai
 import streamlit as st
 import json
-import PIL.Image
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.cache import TTLCache, SQLiteCache
+
+@st.cache_resource(show_spinner=False)
+def _load_model(api_key: str, model_name: str):
+    """Imports the Gemini SDK and builds the model once per process.
+
+    The SDK takes longer to import than the rest of the receipt page combined,
+    so this only runs when a parse is actually requested.
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
 
 class OCRService:
+    PROMPT = """
+            Analyze this receipt and extract:
+            1. Merchant Name
+            2. Date (YYYY-MM-DD)
+            3. Total Amount
+            4. Category (guess from: Food, Rent, Utilities, Salary, Entertainment, Transport, Shopping)
+
+            Return JSON ONLY: {"merchant": str, "date": str, "amount": float, "category": str}
+            """
+    MODEL_NAME = 'gemini-2.5-flash'
+    REQUEST_TIMEOUT = 60  # seconds per Gemini call
+    MAX_WORKERS = 4
+
+    # Parsed results keyed by image hash: a hot in-memory tier over a persistent one
+    CACHE_PATH = ".cache/ocr_results.sqlite"
+    _memory_cache = TTLCache(maxsize=128, ttl=float("inf"))
+    _disk_cache = None
+
     def __init__(self):
+        self._model = None
         try:
-            api_key = st.secrets.get("GEMINI_API_KEY")
-            if not api_key:
+            self.api_key = st.secrets.get("GEMINI_API_KEY")
+            if not self.api_key:
                 st.warning("GEMINI_API_KEY not found in secrets. OCR will not work.")
-                self.model = None
-            else:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-2.5-flash')
         except Exception as e:
             st.error(f"Gemini Init Error: {e}")
-            self.model = None
+            self.api_key = None
+
+    @property
+    def model(self):
+        """The Gemini model, loaded on first access; None if OCR is not configured."""
+        if self._model is None and self.api_key:
+            try:
+                self._model = _load_model(self.api_key, self.MODEL_NAME)
+            except Exception as e:
+                st.error(f"Gemini Init Error: {e}")
+                self.api_key = None
+        return self._model
+
+    @classmethod
+    def _get_disk_cache(cls):
+        if cls._disk_cache is None:
+            cls._disk_cache = SQLiteCache(cls.CACHE_PATH)
+        return cls._disk_cache
+
+    def _cache_key(self, image_file):
+        data = image_file.getvalue() if hasattr(image_file, "getvalue") else image_file.read()
+        if hasattr(image_file, "seek"):
+            image_file.seek(0)
+        # Model and prompt are part of the key so changing either re-parses
+        digest = hashlib.sha256(data)
+        digest.update(f"{self.MODEL_NAME}\n{self.PROMPT}".encode())
+        return digest.hexdigest()
+
+    def _cached(self, key):
+        """The stored result for an image hash, or None."""
+        result = self._memory_cache.get(key)
+        if result is None:
+            result = self._get_disk_cache().get(key)
+            if result is not None:
+                self._memory_cache.set(key, result)
+        return None if result is None else self._as_receipt(result)
+
+    def _parse(self, image_file, key=None):
+        # No Streamlit calls here: this also runs on worker threads
+        key = key or self._cache_key(image_file)
+        result = self._cached(key)
+        if result is not None:
+            return result
+
+        from utils.images import prepare_for_ocr
+        image_bytes, content_type, _ = prepare_for_ocr(image_file)
+        response = self.model.generate_content(
+            [self.PROMPT, {"mime_type": content_type, "data": image_bytes}],
+            request_options={"timeout": self.REQUEST_TIMEOUT}
+        )
+        text = response.text
+
+        # Clean generic markdown if present
+        text = text.replace("```json", "").replace("```", "").strip()
+
+        result = self._as_receipt(json.loads(text))
+        self._memory_cache.set(key, result)
+        self._get_disk_cache().set(key, result)
+        return result
+
+    @staticmethod
+    def _as_receipt(result):
+        """The model sometimes wraps its single object in a list; anything else is an error."""
+        if isinstance(result, list) and len(result) == 1:
+            result = result[0]
+        if not isinstance(result, dict):
+            raise ValueError(f"Expected a JSON object, got {type(result).__name__}")
+        return result
 
     def parse_receipt(self, image_file):
-        if not self.model:
+        if not self.api_key:
             return None
 
         try:
-            img = PIL.Image.open(image_file)
-            prompt = """
-            Analyze this receipt and extract:
-            1. Merchant Name
-            2. Date (YYYY-MM-DD)
-            3. Total Amount
-            4. Category (guess from: Food, Rent, Utilities, Salary, Entertainment, Transport, Shopping)
-            
-            Return JSON ONLY: {"merchant": str, "date": str, "amount": float, "category": str}
-            """
-            
-            response = self.model.generate_content([prompt, img])
-            text = response.text
-            
-            # Clean generic markdown if present
-            text = text.replace("```json", "").replace("```", "").strip()
-            
-            return json.loads(text)
+            # A cached receipt never loads the model (importing the Gemini SDK is slow)
+            key = self._cache_key(image_file)
+            result = self._cached(key)
+            if result is None and self.model:
+                result = self._parse(image_file, key)
+            return result
         except Exception as e:
             st.error(f"OCR Parsing failed: {e}")
             return None
+
+    def parse_receipts(self, image_files, max_workers: int = None, on_progress=None):
+        """Parses many receipts concurrently through a bounded thread pool.
+
+        Returns a list aligned with `image_files` of (result, error) tuples, where
+        exactly one of the two is None. Cached receipts are answered first without
+        loading the model. `on_progress(done, total)` is called from the calling
+        thread as parses finish, so it may update Streamlit widgets.
+        """
+        total = len(image_files)
+        if not self.api_key:
+            return [(None, "OCR is not configured")] * total
+
+        results = [None] * total
+        misses = {}
+        for i, f in enumerate(image_files):
+            key = self._cache_key(f)
+            try:
+                cached = self._cached(key)
+            except Exception as e:
+                results[i] = (None, str(e))
+                continue
+            if cached is None:
+                misses[i] = key
+            else:
+                results[i] = (cached, None)
+        done = total - len(misses)
+        if on_progress and done:
+            on_progress(done, total)
+        if not misses:
+            return results
+        if not self.model:
+            for i in misses:
+                results[i] = (None, "OCR is not configured")
+            return results
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.MAX_WORKERS) as pool:
+            futures = {pool.submit(self._parse, image_files[i], key): i for i, key in misses.items()}
+            for done, future in enumerate(as_completed(futures), start=done + 1):
+                i = futures[future]
+                try:
+                    results[i] = (future.result(), None)
+                except Exception as e:
+                    results[i] = (None, str(e))
+                if on_progress:
+                    on_progress(done, total)
+        return results
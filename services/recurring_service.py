@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from services.incremental import IncrementalModel
+from utils.cache import TTLCache
+from utils.merchants import normalize_merchants
+
+class RecurringService(IncrementalModel):
+    """Finds recurring transactions (subscriptions, rent, salary) in a user's history.
+
+    Transactions are grouped by normalized merchant, sign and amount band; each
+    group keeps running interval statistics (how many gaps between consecutive
+    dates fall near each cadence), so statistics from new transactions merge
+    into those of earlier runs.
+    """
+
+    # cadence -> (period in days, tolerance in days)
+    CADENCES = {
+        "weekly": (7.0, 1),
+        "monthly": (30.44, 3),
+        "annual": (365.25, 7),
+    }
+    MIN_OCCURRENCES = {"weekly": 4, "monthly": 3, "annual": 2}
+    MIN_REGULARITY = 0.75   # share of gaps that must match the cadence
+    AMOUNT_TOLERANCE = 0.15  # width of an amount band (15% steps)
+
+    _KEY = ["merchant_key", "sign", "band"]
+    # How running statistics combine; "last" keeps the newest label
+    _AGG = {
+        "n": "sum", "gap_n": "sum", "amount_sum": "sum",
+        **{f"hits_{c}": "sum" for c in CADENCES},
+        "first_date": "min", "last_date": "max",
+        "merchant": "last", "category": "last", "account": "last",
+    }
+
+    _state = TTLCache(maxsize=256, ttl=6 * 3600)
+
+    def detect(self, as_of: date = None):
+        """Recurring series, largest monthly cost first, as a DataFrame with
+        merchant, cadence, amount, occurrences, last_date, next_date, monthly_cost,
+        category, account, confidence and active (seen within about a period of `as_of`)."""
+        return self._classify(self._model(), pd.Timestamp(as_of or date.today()))
+
+    def _scan(self, frame, stats):
+        """Merges the interval statistics of `frame` into `stats` (None on a first run)."""
+        names = frame["merchant"].astype(object).where(frame["merchant"].notna(), frame["description"])
+        rows = pd.DataFrame({
+            "merchant_key": normalize_merchants(names),
+            "sign": np.sign(frame["amount"]).astype("int8"),
+            "band": np.floor(np.log(frame["amount"].abs()) / np.log1p(self.AMOUNT_TOLERANCE)),
+            "date": frame["date"],
+            "amount": frame["amount"],
+            "merchant": names,
+            "category": frame["category"].astype(object),
+            "account": frame["account"].astype(object),
+            "prior": False,
+        })
+        rows = rows[(rows["merchant_key"] != "") & (rows["amount"] != 0)]
+        if stats is not None:
+            # Each known series' last date anchors the first gap of the new rows
+            anchors = stats["last_date"].rename("date").reset_index().assign(prior=True)
+            rows = pd.concat([anchors, rows], ignore_index=True)
+
+        rows = rows.sort_values(self._KEY + ["date"], kind="stable")
+        gap = rows.groupby(self._KEY, sort=False)["date"].diff().dt.days
+        rows = rows.assign(gap=gap, **{
+            f"hits_{c}": (gap - period).abs() <= tol for c, (period, tol) in self.CADENCES.items()
+        })
+        rows = rows[~rows["prior"]]
+
+        batch = rows.groupby(self._KEY, sort=False).agg(
+            n=("date", "size"), gap_n=("gap", "count"), amount_sum=("amount", "sum"),
+            **{f"hits_{c}": (f"hits_{c}", "sum") for c in self.CADENCES},
+            first_date=("date", "min"), last_date=("date", "max"),
+            merchant=("merchant", "last"), category=("category", "last"), account=("account", "last"),
+        )
+        if stats is None:
+            return batch
+        return pd.concat([stats, batch]).groupby(level=self._KEY, sort=False).agg(self._AGG)
+
+    def _classify(self, stats, as_of):
+        columns = ["merchant", "cadence", "amount", "occurrences", "last_date", "next_date",
+                   "monthly_cost", "category", "account", "confidence", "active"]
+        if stats is None or stats.empty:
+            return pd.DataFrame(columns=columns)
+
+        hits = stats[[f"hits_{c}" for c in self.CADENCES]].to_numpy(dtype="float64")
+        best = hits.argmax(axis=1)
+        cadences = np.array(list(self.CADENCES))[best]
+        periods = np.array([p for p, _ in self.CADENCES.values()])[best]
+        min_occurrences = np.array([self.MIN_OCCURRENCES[c] for c in self.CADENCES])[best]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            confidence = hits.max(axis=1) / stats["gap_n"].to_numpy()
+
+        keep = (stats["n"].to_numpy() >= min_occurrences) & (confidence >= self.MIN_REGULARITY)
+        found = stats[keep]
+        periods = periods[keep]
+        amount = found["amount_sum"] / found["n"]
+        since_last = (as_of - found["last_date"]).dt.days
+        out = pd.DataFrame({
+            "merchant": found["merchant"],
+            "cadence": cadences[keep],
+            "amount": amount.round(2),
+            "occurrences": found["n"].astype(int),
+            "last_date": found["last_date"],
+            "next_date": found["last_date"] + pd.to_timedelta(np.round(periods), unit="D"),
+            "monthly_cost": (amount * self.CADENCES["monthly"][0] / periods).round(2),
+            "category": found["category"],
+            "account": found["account"],
+            "confidence": confidence[keep].round(2),
+            "active": since_last <= periods * 1.5,
+        }, columns=columns)
+        return out.sort_values("monthly_cost", key=np.abs, ascending=False).reset_index(drop=True)
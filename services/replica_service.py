@@ -0,0 +1,407 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import httpx
+import streamlit as st
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from utils.periods import period_window
+
+class LocalReplica:
+    """Per-user SQLite copy of the user's rows, kept current by incremental sync.
+
+    Pulls only rows whose `updated_at` is past the last watermark (plus tombstones
+    for deletes) and pushes writes that were queued while Supabase was unreachable.
+    Reads return the same shapes as the PostgREST queries in DataService.
+
+    The copy lives on the Streamlit server, not the user's device: "offline" means
+    the server can't reach Supabase, not that the browser can't reach the app. The
+    files are unencrypted and outside row-level security, so the replica is off
+    unless REPLICA_DIR is set in the Streamlit secrets; that directory and the
+    files in it are made owner-only.
+    """
+
+    SYNC_INTERVAL = 60  # seconds between automatic pulls
+    PAGE_SIZE = 500
+    # Re-read a little before the watermark: rows committed late with an older now() aren't missed
+    OVERLAP = timedelta(minutes=5)
+
+    TABLES = {
+        "accounts": ["id", "user_id", "name", "type", "balance", "created_at", "updated_at"],
+        "categories": ["id", "user_id", "name", "type", "is_default", "color", "updated_at"],
+        "transactions": ["id", "user_id", "account_id", "category_id", "date", "amount", "description",
+                         "merchant", "status", "receipt_path", "created_at", "updated_at"],
+        "budgets": ["id", "user_id", "category_id", "amount_limit", "period", "window_days", "updated_at"],
+    }
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, user_id: str, path: str):
+        self.user_id = user_id
+        self.path = path
+        self.last_sync = 0.0
+        self.last_error = None
+        self._lock = threading.RLock()
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.chmod(directory, 0o700)
+        # Created owner-only before SQLite opens it; its journal files take the same mode
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(path, 0o600)
+        with self._connect() as conn:
+            for table, cols in self.TABLES.items():
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, {', '.join(cols[1:])})")
+                # Replicas created by older versions: add columns introduced since
+                existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+                for col in cols:
+                    if col not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {col}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date DESC, id DESC)")
+            conn.execute("CREATE TABLE IF NOT EXISTS watermarks (name TEXT PRIMARY KEY, value TEXT)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT, op TEXT,"
+                " row_id TEXT, payload TEXT, error TEXT)"
+            )
+
+    @staticmethod
+    def directory():
+        """REPLICA_DIR from the Streamlit secrets, or None when the replica is disabled."""
+        try:
+            return st.secrets.get("REPLICA_DIR")
+        except Exception:
+            # No secrets file
+            return None
+
+    @classmethod
+    def for_user(cls, user_id: str):
+        with cls._instances_lock:
+            if user_id not in cls._instances:
+                cls._instances[user_id] = cls(user_id, os.path.join(cls.directory(), f"replica_{user_id}.sqlite"))
+            return cls._instances[user_id]
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            try:
+                with conn:  # commits on success
+                    yield conn
+            finally:
+                conn.close()
+
+    # --- Sync ---
+    def sync_if_stale(self, client):
+        if time.time() - self.last_sync < self.SYNC_INTERVAL:
+            return None
+        try:
+            return self.sync(client)
+        except httpx.TransportError as e:
+            # Offline: keep serving what we have
+            self.last_error = str(e)
+            self.last_sync = time.time()
+            return None
+
+    def sync(self, client):
+        """Pushes queued writes, then pulls changes. Returns counts of each."""
+        stats = {"pushed": self.push(client), "pulled": 0, "deleted": 0}
+        for table in self.TABLES:
+            stats["pulled"] += self._pull_table(client, table)
+        stats["deleted"] = self._pull_tombstones(client)
+        self.last_sync = time.time()
+        self.last_error = None
+        return stats
+
+    def _get_watermark(self, conn, name):
+        row = conn.execute("SELECT value FROM watermarks WHERE name = ?", (name,)).fetchone()
+        return row["value"] if row else None
+
+    def _since(self, watermark):
+        return (datetime.fromisoformat(watermark) - self.OVERLAP).isoformat()
+
+    def _pull_table(self, client, table):
+        cols = self.TABLES[table]
+        with self._connect() as conn:
+            watermark = self._get_watermark(conn, table)
+
+        pulled = 0
+        cursor = None
+        while True:
+            query = client.table(table).select(",".join(cols)).order("updated_at").order("id")
+            if cursor:
+                last_ts, last_id = cursor
+                query = query.or_(f'updated_at.gt."{last_ts}",and(updated_at.eq."{last_ts}",id.gt.{last_id})')
+            elif watermark:
+                query = query.gte("updated_at", self._since(watermark))
+            rows = query.limit(self.PAGE_SIZE).execute().data
+            if not rows:
+                break
+
+            with self._connect() as conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                    [tuple(r.get(c) for c in cols) for r in rows]
+                )
+                newest = rows[-1]["updated_at"]
+                if not watermark or newest > watermark:
+                    watermark = newest
+                    conn.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?)", (table, watermark))
+
+            pulled += len(rows)
+            cursor = (rows[-1]["updated_at"], rows[-1]["id"])
+            if len(rows) < self.PAGE_SIZE:
+                break
+        return pulled
+
+    def _pull_tombstones(self, client):
+        # Tombstone ids are a sequence, so they make an exact watermark
+        with self._connect() as conn:
+            last_id = int(self._get_watermark(conn, "sync_tombstones") or 0)
+
+        deleted = 0
+        while True:
+            rows = client.table("sync_tombstones").select("id, table_name, row_id") \
+                .gt("id", last_id).order("id").limit(self.PAGE_SIZE).execute().data
+            if not rows:
+                break
+            with self._connect() as conn:
+                for r in rows:
+                    if r["table_name"] in self.TABLES:
+                        conn.execute(f"DELETE FROM {r['table_name']} WHERE id = ?", (r["row_id"],))
+                last_id = rows[-1]["id"]
+                conn.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?)", ("sync_tombstones", str(last_id)))
+            deleted += len(rows)
+            if len(rows) < self.PAGE_SIZE:
+                break
+        return deleted
+
+    # --- Queued Writes ---
+    def queue_write(self, table: str, op: str, data: dict = None, row_id: str = None):
+        """Applies a write locally and queues it for the next push.
+
+        Inserts get a client-side id so the pushed row keeps the identity used locally.
+        """
+        data = dict(data or {})
+        if op == "insert":
+            data.setdefault("id", str(uuid.uuid4()))
+            row_id = data["id"]
+        with self._connect() as conn:
+            self._apply_local(conn, table, op, data, row_id)
+            conn.execute(
+                "INSERT INTO outbox (table_name, op, row_id, payload) VALUES (?, ?, ?, ?)",
+                (table, op, row_id, json.dumps(data))
+            )
+        return row_id
+
+    def _apply_local(self, conn, table, op, data, row_id):
+        # Mirror the server's balance trigger so offline balances stay plausible;
+        # the next pull replaces them with the server's numbers.
+        if table == "transactions":
+            old = conn.execute("SELECT account_id, amount FROM transactions WHERE id = ?", (row_id,)).fetchone()
+            if old and op in ("update", "delete"):
+                conn.execute("UPDATE accounts SET balance = balance - ? WHERE id = ?", (old["amount"], old["account_id"]))
+            if op in ("insert", "update"):
+                account_id = data.get("account_id", old["account_id"] if old else None)
+                amount = data.get("amount", old["amount"] if old else 0)
+                conn.execute("UPDATE accounts SET balance = balance + ? WHERE id = ?", (amount, account_id))
+
+        cols = [c for c in data if c in self.TABLES[table]]
+        if op == "insert":
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                [data[c] for c in cols]
+            )
+        elif op == "update" and cols:
+            conn.execute(
+                f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in cols)} WHERE id = ?",
+                [data[c] for c in cols] + [row_id]
+            )
+        elif op == "delete":
+            conn.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+
+    def push(self, client):
+        """Replays queued writes in order. Stops at the first network failure;
+        writes the server rejects are kept with their error and skipped from then on."""
+        with self._connect() as conn:
+            queued = conn.execute("SELECT * FROM outbox WHERE error IS NULL ORDER BY seq").fetchall()
+
+        pushed = 0
+        for item in queued:
+            data = json.loads(item["payload"])
+            builder = client.table(item["table_name"])
+            try:
+                if item["op"] == "insert":
+                    builder.insert(data).execute()
+                elif item["op"] == "update":
+                    builder.update(data).eq("id", item["row_id"]).execute()
+                else:
+                    builder.delete().eq("id", item["row_id"]).execute()
+            except httpx.TransportError:
+                raise
+            except Exception as e:
+                with self._connect() as conn:
+                    conn.execute("UPDATE outbox SET error = ? WHERE seq = ?", (str(e), item["seq"]))
+                continue
+            with self._connect() as conn:
+                conn.execute("DELETE FROM outbox WHERE seq = ?", (item["seq"],))
+            pushed += 1
+        return pushed
+
+    def outbox_status(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FILTER (WHERE error IS NULL) AS pending,"
+                " COUNT(*) FILTER (WHERE error IS NOT NULL) AS failed FROM outbox"
+            ).fetchone()
+        return {"pending": row["pending"], "failed": row["failed"]}
+
+    # --- Reads ---
+    def query(self, sql: str, params=()):
+        """Runs an ad-hoc read against the replica (e.g. for local analytics)."""
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+    def accounts(self):
+        return self.query("SELECT * FROM accounts ORDER BY created_at")
+
+    def categories(self, type=None):
+        if type:
+            return self.query("SELECT * FROM categories WHERE type = ? ORDER BY name", (type,))
+        return self.query("SELECT * FROM categories ORDER BY name")
+
+    def budgets(self):
+        rows = self.query(
+            "SELECT b.*, c.name AS _category_name FROM budgets b"
+            " LEFT JOIN categories c ON c.id = b.category_id"
+        )
+        for r in rows:
+            name = r.pop("_category_name")
+            r["categories"] = {"name": name} if name is not None else None
+        return rows
+
+    def transactions(self, start_date=None, end_date=None, after=None, limit: int = None, with_receipt: bool = False,
+                     terms=(), account_id=None, category_id=None):
+        """Newest first, with the accounts(name) / categories(name, color) joins nested."""
+        sql = (
+            "SELECT t.*, a.name AS _account_name, c.name AS _category_name, c.color AS _category_color"
+            " FROM transactions t"
+            " LEFT JOIN accounts a ON a.id = t.account_id"
+            " LEFT JOIN categories c ON c.id = t.category_id WHERE 1 = 1"
+        )
+        params = []
+        if start_date:
+            sql += " AND t.date >= ?"
+            params.append(start_date.isoformat())
+        if end_date:
+            sql += " AND t.date <= ?"
+            params.append(end_date.isoformat())
+        if with_receipt:
+            sql += " AND t.receipt_path IS NOT NULL"
+        if account_id:
+            sql += " AND t.account_id = ?"
+            params.append(account_id)
+        if category_id:
+            sql += " AND t.category_id = ?"
+            params.append(category_id)
+        for term in terms:
+            # LIKE is case-insensitive for ASCII in SQLite, like ILIKE
+            sql += " AND (t.merchant LIKE ? OR t.description LIKE ?)"
+            params += [f"%{term}%", f"%{term}%"]
+        if after:
+            sql += " AND (t.date < ? OR (t.date = ? AND t.id < ?))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY t.date DESC, t.id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self.query(sql, params)
+        for r in rows:
+            account_name = r.pop("_account_name")
+            category_name = r.pop("_category_name")
+            category_color = r.pop("_category_color")
+            r["accounts"] = {"name": account_name} if account_name is not None else None
+            r["categories"] = {"name": category_name, "color": category_color} if category_name is not None else None
+        return rows
+
+    def balance_at(self, account_id, as_of):
+        """Closing balance on `as_of`: the current balance minus everything dated later."""
+        row = self.query(
+            "SELECT a.balance - COALESCE((SELECT SUM(t.amount) FROM transactions t"
+            " WHERE t.account_id = a.id AND t.date > ?), 0) AS balance"
+            " FROM accounts a WHERE a.id = ?",
+            (as_of.isoformat(), account_id)
+        )
+        return float(row[0]["balance"]) if row else 0.0
+
+    def daily_net(self, account_id, after, end_date):
+        """Same rows as the account_daily_net SQL function, unpaged."""
+        return self.query(
+            "SELECT date, SUM(amount) AS net FROM transactions"
+            " WHERE account_id = ? AND date > ? AND date <= ?"
+            " GROUP BY date ORDER BY date",
+            (account_id, after.isoformat(), end_date.isoformat())
+        )
+
+    # Same results as the dashboard_* SQL functions in schema.sql
+    _BUCKETS = {
+        "day": "date",
+        "week": "date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7) || ' days')",
+        "month": "strftime('%Y-%m-01', date)",
+        "quarter": "printf('%s-%02d-01', strftime('%Y', date), (CAST(strftime('%m', date) AS INTEGER) - 1) / 3 * 3 + 1)",
+    }
+
+    def dashboard_kpis(self, start_date, end_date):
+        return self.query(
+            "SELECT COALESCE(SUM(CASE WHEN amount > 0 THEN amount END), 0) AS income,"
+            " COALESCE(SUM(CASE WHEN amount < 0 THEN amount END), 0) AS expenses,"
+            " COALESCE(SUM(amount), 0) AS net, COUNT(*) AS txn_count"
+            " FROM transactions WHERE date BETWEEN ? AND ?",
+            (start_date.isoformat(), end_date.isoformat())
+        )
+
+    def dashboard_category_totals(self, start_date, end_date):
+        return self.query(
+            "SELECT t.category_id, COALESCE(c.name, 'Uncategorized') AS category_name, c.color,"
+            " -SUM(t.amount) AS total"
+            " FROM transactions t LEFT JOIN categories c ON c.id = t.category_id"
+            " WHERE t.amount < 0 AND t.date BETWEEN ? AND ?"
+            " GROUP BY t.category_id, c.name, c.color ORDER BY total DESC",
+            (start_date.isoformat(), end_date.isoformat())
+        )
+
+    def dashboard_period_totals(self, start_date, end_date, bucket: str = "day"):
+        return self.query(
+            f"SELECT {self._BUCKETS[bucket]} AS period_start,"
+            " COALESCE(SUM(CASE WHEN amount > 0 THEN amount END), 0) AS income,"
+            " COALESCE(SUM(CASE WHEN amount < 0 THEN amount END), 0) AS expenses,"
+            " SUM(amount) AS net"
+            " FROM transactions WHERE date BETWEEN ? AND ?"
+            " GROUP BY 1 ORDER BY 1",
+            (start_date.isoformat(), end_date.isoformat())
+        )
+
+    def budget_status(self, as_of, history: int = 0):
+        """Same rows as the budget_status SQL function, computed from local transactions."""
+        rows = []
+        for b in self.budgets():
+            for idx in range(history + 1):
+                start, end = period_window(b["period"], as_of, idx, b["window_days"])
+                spent = self.query(
+                    "SELECT COALESCE(-SUM(amount), 0) AS spent FROM transactions"
+                    " WHERE category_id = ? AND amount < 0 AND date BETWEEN ? AND ?",
+                    (b["category_id"], start.isoformat(), end.isoformat())
+                )[0]["spent"]
+                rows.append({
+                    "budget_id": b["id"], "category_id": b["category_id"],
+                    "category_name": (b["categories"] or {}).get("name"),
+                    "amount_limit": b["amount_limit"], "period": b["period"], "window_days": b["window_days"],
+                    "window_index": idx, "window_start": start.isoformat(), "window_end": end.isoformat(),
+                    "spent": spent
+                })
+        return rows
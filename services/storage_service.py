@@ -1,36 +1,137 @@
 from services.supabase_client import SupabaseClient
+from utils.cache import TTLCache
 import streamlit as st
+import os
 
 class StorageService:
+    SIGNED_URL_EXPIRY = 3600  # seconds
+    # Cached URLs are dropped this long before they expire, so a page never renders a dead link
+    REFRESH_MARGIN = 300
+    SIGN_BATCH_SIZE = 1000
+    THUMBNAIL_EXT = "webp"  # utils.images.make_thumbnail encodes WEBP
+
+    # (user_id, bucket, path) -> signed URL; shared across reruns and sessions
+    _url_cache = TTLCache(maxsize=4096, ttl=SIGNED_URL_EXPIRY - REFRESH_MARGIN)
+
     def __init__(self):
         self.supabase = SupabaseClient.get_instance()
         self.bucket = "receipts"
 
-    def upload_receipt(self, file, file_name: str, user_id: str):
-        """Uploads a file to Supabase Storage and returns the path."""
+    @classmethod
+    def thumbnail_path(cls, path: str):
+        """Where the gallery thumbnail of a receipt lives: `{user_id}/thumbs/{name}.webp`."""
+        folder, name = path.rsplit("/", 1)
+        return f"{folder}/thumbs/{os.path.splitext(name)[0]}.{cls.THUMBNAIL_EXT}"
+
+    @staticmethod
+    def original_path(path: str):
+        """Where the untouched upload of a receipt lives, if it was kept: `{user_id}/originals/{name}`.
+
+        The name has no extension, since the stored receipt may have been re-encoded;
+        the object's content type is the upload's.
+        """
+        folder, name = path.rsplit("/", 1)
+        return f"{folder}/originals/{os.path.splitext(name)[0]}"
+
+    def upload_receipt(self, file, file_name: str, user_id: str, optimize: bool = True, keep_original: bool = False,
+                       thumbnail: bool = True):
+        """Uploads a file to Supabase Storage and returns the path.
+
+        With `optimize`, images are rotated upright, downscaled and re-encoded as JPEG
+        (the returned path's extension changes to match). `keep_original` additionally
+        stores the untouched upload at `original_path(path)`, and `thumbnail` a
+        small preview at `thumbnail_path(path)`.
+        """
         try:
             path = f"{user_id}/{file_name}"
             # Read file bytes
-            file_bytes = file.getvalue()
+            file_bytes = original_bytes = file.getvalue()
+            content_type = original_type = file.type
             
             # Check if bucket exists (can't create via client easily for public, 
             # assume it exists as per schema instructions or handle error)
+            bucket = self.supabase.storage.from_(self.bucket)
+
+            if optimize:
+                try:
+                    # Pillow is only loaded once something is actually uploaded
+                    from utils.images import prepare_for_storage
+                    file_bytes, content_type, ext = prepare_for_storage(file_bytes)
+                    path = f"{user_id}/{os.path.splitext(file_name)[0]}.{ext}"
+                except Exception:
+                    pass  # Not an image Pillow can read; store as-is
             
             # Upload
-            res = self.supabase.storage.from_(self.bucket).upload(
+            res = bucket.upload(
                 path=path,
                 file=file_bytes,
-                file_options={"content-type": file.type}
+                file_options={"content-type": content_type}
             )
+
+            if keep_original:
+                bucket.upload(
+                    path=self.original_path(path),
+                    file=original_bytes,
+                    file_options={"content-type": original_type}
+                )
+
+            if thumbnail:
+                try:
+                    from utils.images import make_thumbnail
+                    thumb_bytes, thumb_type, _ = make_thumbnail(file_bytes)
+                    bucket.upload(
+                        path=self.thumbnail_path(path),
+                        file=thumb_bytes,
+                        file_options={"content-type": thumb_type}
+                    )
+                except Exception:
+                    pass  # The gallery shows a placeholder instead
             return path
         except Exception as e:
             st.error(f"Upload failed: {e}")
             return None
 
+    def remove_receipts(self, paths):
+        """Deletes receipts with their thumbnails and kept originals, in one request.
+        Objects that don't exist are skipped by Storage."""
+        objects = []
+        for path in dict.fromkeys(p for p in paths if p):
+            objects += [path, self.thumbnail_path(path), self.original_path(path)]
+        if objects:
+            self.supabase.storage.from_(self.bucket).remove(objects)
+
+    def _url_key(self, path: str):
+        # Signing is authorized per user by storage RLS, so cached URLs are too
+        user = st.session_state.get("user")
+        return (user.id if user else None, self.bucket, path)
+
     def get_public_url(self, path: str):
-        try:
-            # For private buckets, we need create_signed_url
-            res = self.supabase.storage.from_(self.bucket).create_signed_url(path, 3600) # 1 hour
-            return res['signedURL']
-        except Exception as e:
-            return None
+        """Signed URL for one object, reused until shortly before it expires."""
+        return self.get_signed_urls([path]).get(path)
+
+    def get_signed_urls(self, paths):
+        """Signed URLs for many objects: {path: url}, omitting paths that failed.
+
+        Cached URLs are reused; the rest are signed in one request per
+        SIGN_BATCH_SIZE paths.
+        """
+        urls, missing = {}, []
+        for path in dict.fromkeys(p for p in paths if p):
+            url = self._url_cache.get(self._url_key(path))
+            if url:
+                urls[path] = url
+            else:
+                missing.append(path)
+
+        bucket = self.supabase.storage.from_(self.bucket)
+        for i in range(0, len(missing), self.SIGN_BATCH_SIZE):
+            try:
+                signed = bucket.create_signed_urls(missing[i:i + self.SIGN_BATCH_SIZE], self.SIGNED_URL_EXPIRY)
+            except Exception:
+                continue
+            for item in signed:
+                if item.get("error") or not item.get("signedURL"):
+                    continue
+                urls[item["path"]] = item["signedURL"]
+                self._url_cache.set(self._url_key(item["path"]), item["signedURL"])
+        return urls
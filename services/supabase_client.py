@@ -1,9 +1,90 @@
+import http.cookiejar
+import threading
+import time
+from collections import OrderedDict
+import httpx
 import streamlit as st
-from supabase import create_client, Client
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from supabase import create_client, Client, ClientOptions
+from utils import metrics
+
+
+class ClientPool:
+    """Supabase clients keyed by browser session, LRU-bounded with idle eviction.
+
+    Each session gets its own client, so sign-in state and the Authorization
+    header never cross users. All clients send their requests through one shared
+    httpx.Client, so TCP/TLS keep-alive connections are reused across sessions
+    (headers are per request; cookies are never stored).
+    """
+
+    def __init__(self, factory, maxsize: int = 200, idle_timeout: float = 30 * 60):
+        self.factory = factory
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            self._evict_idle()
+            entry = self._clients.get(key)
+            if entry is not None:
+                return self._touch(key, entry)
+
+        # Built without the lock: creating a client may refresh its token over the
+        # network, and other sessions must not wait on that
+        client = self.factory()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                # A concurrent call for the same session got there first
+                self._close(client)
+                return self._touch(key, entry)
+            entry = self._clients[key] = [client, 0.0]
+            while len(self._clients) > self.maxsize:
+                _, (oldest, _) = self._clients.popitem(last=False)
+                self._close(oldest)
+            return self._touch(key, entry)
+
+    def _touch(self, key, entry):
+        entry[1] = time.monotonic()
+        self._clients.move_to_end(key)
+        return entry[0]
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._clients.pop(key, None)
+        if entry:
+            self._close(entry[0])
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._clients:
+            key, (client, last_used) = next(iter(self._clients.items()))
+            if last_used >= cutoff:
+                break
+            del self._clients[key]
+            self._close(client)
+
+    @staticmethod
+    def _close(client):
+        # Stop the token auto-refresh timer; the shared connections stay open
+        timer = getattr(client.auth, "_refresh_token_timer", None)
+        if timer:
+            timer.cancel()
+
+    def __len__(self):
+        return len(self._clients)
+
 
 class SupabaseClient:
     _instance = None
-    _client: Client = None
+    _client: Client = None  # injected client, used instead of the pool
+    _pool: ClientPool = None
+
+    MAX_CLIENTS = 200
+    IDLE_TIMEOUT = 30 * 60  # seconds
 
     def __new__(cls):
         if cls._instance is None:
@@ -13,21 +94,80 @@ class SupabaseClient:
 
     def _init_client(self):
         try:
-            url = st.secrets["SUPABASE_URL"]
-            key = st.secrets["SUPABASE_KEY"]
-            self._client = create_client(url, key)
+            self._url = st.secrets["SUPABASE_URL"]
+            self._key = st.secrets["SUPABASE_KEY"]
+            self._http = httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                timeout=httpx.Timeout(120.0, connect=10.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                # A shared client must not carry one user's cookies into another's requests
+                cookies=http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(allowed_domains=[])),
+            )
+            self._pool = ClientPool(self._create_client, self.MAX_CLIENTS, self.IDLE_TIMEOUT)
         except Exception as e:
             st.error(f"Failed to initialize Supabase client: {e}")
-            self._client = None
+            self._pool = None
+
+    def _create_client(self) -> Client:
+        client = create_client(self._url, self._key, ClientOptions(httpx_client=self._http))
+        # The session's tokens live in one dict in session_state. Refreshes write the
+        # rotated pair back (from the auth timer thread, so no Streamlit calls), and a
+        # client rebuilt after idle eviction resumes from it, refreshing if expired.
+        tokens = st.session_state.setdefault("auth_tokens", {})
+        client.auth.on_auth_state_change(lambda event, session: self._save_tokens(tokens, event, session))
+        if tokens.get("refresh_token"):
+            try:
+                client.auth.set_session(tokens["access_token"], tokens["refresh_token"])
+            except Exception:
+                # Refresh token expired or revoked: back to the login form
+                tokens.clear()
+                st.session_state.pop("user", None)
+                st.error("Your session has expired. Please log in again.")
+                st.stop()
+        return client
+
+    @staticmethod
+    def _save_tokens(tokens, event, session):
+        if event in ("SIGNED_IN", "TOKEN_REFRESHED") and session:
+            tokens.update(access_token=session.access_token, refresh_token=session.refresh_token)
+
+    @staticmethod
+    def _session_key():
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else None
 
     @property
     def client(self) -> Client:
-        if self._client is None:
+        if self._client is not None:
+            return self._client
+        if self._pool is None:
             self._init_client()
-        return self._client
-    
+            if self._pool is None:
+                return None
+        return self._pool.get(self._session_key())
+
+    @classmethod
+    def set_client(cls, client):
+        """Injects a client (e.g. the in-memory one in benchmarks/) in place of the pool."""
+        if cls._instance is None:
+            cls._instance = super(SupabaseClient, cls).__new__(cls)
+        cls._instance._client = client
+
+    @classmethod
+    def release_session(cls):
+        """Drops the current session's client (on logout)."""
+        if cls._instance is not None and cls._instance._pool is not None:
+            cls._instance._pool.discard(cls._session_key())
+
     @staticmethod
     def get_instance():
+        """The current browser session's client."""
         if SupabaseClient._instance is None:
             SupabaseClient()
-        return SupabaseClient._instance.client
+        client = SupabaseClient._instance.client
+        # With the sidebar debug panel on, every call is timed and recorded
+        recorder = metrics.active()
+        if recorder and client is not None:
+            return metrics.TracedClient(client, recorder)
+        return client
@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Keys are tuples; `invalidate(prefix)` drops every key starting with `prefix`,
+    which is how DataService clears one user's table after a write.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, prefix: tuple = ()):
+        with self._lock:
+            stale = [k for k in self._data if k[:len(prefix)] == prefix]
+            for k in stale:
+                del self._data[k]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data)
+            }
+
+
+class SQLiteCache:
+    """Persistent key -> JSON value store capped at `max_bytes` of payload.
+
+    When the cap is exceeded the least recently read entries are evicted first.
+    A connection is opened per call so instances can be shared across threads.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:  # commits on success
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str, default=None):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value):
+        payload = json.dumps(value)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time())
+            )
+            # Keep the newest entries whose running size fits under the cap
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) AS running FROM entries)"
+                " WHERE running > ?)",
+                (self.max_bytes,)
+            )
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            size, count = conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "bytes": size, "size": count}
@@ -0,0 +1,35 @@
+import numpy as np
+
+# Approximate length of each DataService.PERIOD_BUCKETS bucket, finest first
+BUCKET_DAYS = {"day": 1, "week": 7, "month": 30.44, "quarter": 91.31}
+MAX_BARS = 120       # bars a chart shows before it is better drawn as a line
+MAX_POINTS = 1000    # points a line keeps after downsampling
+
+def pick_bucket(start_date, end_date, max_bars: int = MAX_BARS):
+    """Finest bucket that splits the range into at most `max_bars` periods."""
+    days = (end_date - start_date).days + 1
+    for bucket, length in BUCKET_DAYS.items():
+        if days / length <= max_bars:
+            return bucket
+    return bucket
+
+def downsample_minmax(frame, y: str, max_points: int = MAX_POINTS):
+    """Rows of `frame` (in x order) reduced to about `max_points`, keeping each span's min and max of `y`.
+
+    Unlike averaging or taking every n-th row, spikes survive, so the line keeps its shape.
+    """
+    n = len(frame)
+    if n <= max_points:
+        return frame
+    size = -(-n // max(max_points // 2, 1))  # rows per span
+    spans = -(-n // size)
+    values = np.full(spans * size, np.nan)
+    values[:n] = frame[y].to_numpy(dtype="float64")
+    blocks = values.reshape(spans, size)
+    offsets = np.arange(spans) * size
+    keep = np.unique(np.concatenate([
+        offsets + np.nanargmin(blocks, axis=1),
+        offsets + np.nanargmax(blocks, axis=1),
+        [0, n - 1],
+    ]))
+    return frame.iloc[keep]
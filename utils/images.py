@@ -0,0 +1,60 @@
+import io
+import PIL.Image
+import PIL.ImageOps
+
+# Longest side in pixels. Receipt text stays legible to the model well below
+# phone-camera resolution; stored copies keep a little more detail for humans.
+OCR_MAX_SIDE = 1600
+STORAGE_MAX_SIDE = 2048
+THUMBNAIL_SIDE = 320
+
+FORMATS = {
+    "JPEG": ("image/jpeg", "jpg"),
+    "WEBP": ("image/webp", "webp"),
+}
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    data = source.read()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return data
+
+def load_image(source):
+    """Opens bytes or a file-like object, applying the EXIF orientation tag."""
+    img = PIL.Image.open(io.BytesIO(_read_bytes(source)))
+    return PIL.ImageOps.exif_transpose(img)
+
+def downscale(img, max_side: int):
+    if max(img.size) > max_side:
+        img = img.copy()
+        img.thumbnail((max_side, max_side), PIL.Image.Resampling.LANCZOS)
+    return img
+
+def encode(img, fmt: str = "JPEG", quality: int = 82):
+    """Re-encodes an image; returns (bytes, content_type, extension)."""
+    content_type, ext = FORMATS[fmt]
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format=fmt, quality=quality, optimize=True)
+    return out.getvalue(), content_type, ext
+
+def prepare_for_ocr(source):
+    """Upright, downscaled, high-contrast grayscale JPEG for the OCR model."""
+    img = downscale(load_image(source), OCR_MAX_SIDE)
+    img = PIL.ImageOps.autocontrast(PIL.ImageOps.grayscale(img), cutoff=1)
+    return encode(img, "JPEG", quality=85)
+
+def prepare_for_storage(source, fmt: str = "JPEG", quality: int = 82):
+    """Upright, downscaled colour copy for the receipts bucket."""
+    img = downscale(load_image(source), STORAGE_MAX_SIDE)
+    return encode(img, fmt, quality)
+
+def make_thumbnail(source, fmt: str = "WEBP", quality: int = 70):
+    """Small upright colour preview for the receipt gallery."""
+    img = downscale(load_image(source), THUMBNAIL_SIDE)
+    return encode(img, fmt, quality)
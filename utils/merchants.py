@@ -0,0 +1,18 @@
+import re
+import pandas as pd
+
+# Words that vary between statements of the same merchant ("Netflix.com", "Acme Inc")
+NOISE = r"\b(?:www|com|net|inc|llc|ltd|co)\b"
+_STRIP = r"[^a-z&' ]+"
+
+def normalize_merchants(names: pd.Series):
+    """Lowercase names without digits, punctuation or noise words ("NETFLIX.COM #123" -> "netflix")."""
+    return (names.astype(object).fillna("").str.lower()
+            .str.replace(_STRIP, " ", regex=True)
+            .str.replace(NOISE, " ", regex=True)
+            .str.split().str.join(" "))
+
+def normalize_merchant(name: str):
+    """normalize_merchants for a single name."""
+    text = re.sub(NOISE, " ", re.sub(_STRIP, " ", (name or "").lower()))
+    return " ".join(text.split())
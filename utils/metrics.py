@@ -0,0 +1,265 @@
+import functools
+import inspect
+import json
+import threading
+import time
+import streamlit as st
+
+# Builder calls that decide what kind of request a query becomes
+OPERATIONS = ("select", "insert", "upsert", "update", "delete")
+
+_local = threading.local()
+
+
+class CallMetrics:
+    """Per-session record of Supabase calls, grouped by rerun.
+
+    `begin_rerun()` is called at the top of every page (from setup_sidebar), so
+    `last` always holds the calls of the most recent completed rerun. Running
+    totals for the whole session back the Prometheus export.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = []
+        self.last = []
+        self.totals = {}
+
+    def begin_rerun(self):
+        with self._lock:
+            if self.current:
+                self.last = self.current
+            self.current = []
+
+    def record(self, table: str, op: str, rows: int = 0, nbytes: int = 0, seconds: float = 0.0,
+               cache_hit: bool = False, error: str = None):
+        entry = {
+            "ts": time.time(), "method": current_method(), "table": table, "op": op,
+            "rows": rows, "bytes": nbytes, "seconds": seconds, "cache_hit": cache_hit, "error": error
+        }
+        key = (entry["method"], table, op, cache_hit)
+        with self._lock:
+            self.current.append(entry)
+            total = self.totals.setdefault(key, {"calls": 0, "errors": 0, "rows": 0, "bytes": 0, "seconds": 0.0})
+            total["calls"] += 1
+            total["errors"] += error is not None
+            total["rows"] += rows
+            total["bytes"] += nbytes
+            total["seconds"] += seconds
+
+    def summary(self, records=None):
+        """One row per (method, table, op) with call counts, cache hits and time."""
+        grouped = {}
+        for r in self.last if records is None else records:
+            g = grouped.setdefault((r["method"], r["table"], r["op"]), {
+                "method": r["method"], "table": r["table"], "op": r["op"],
+                "calls": 0, "cache_hits": 0, "errors": 0, "rows": 0, "kb": 0.0, "ms": 0.0
+            })
+            g["calls"] += 1
+            g["cache_hits"] += r["cache_hit"]
+            g["errors"] += r["error"] is not None
+            g["rows"] += r["rows"]
+            g["kb"] += r["bytes"] / 1024
+            g["ms"] += r["seconds"] * 1000
+        return sorted(grouped.values(), key=lambda g: -g["ms"])
+
+    def to_jsonl(self, records=None):
+        return "".join(json.dumps(r) + "\n" for r in (self.last if records is None else records))
+
+    def to_prometheus(self):
+        """Session totals in the Prometheus text exposition format."""
+        metrics = {
+            "calls_total": ("counter", "Supabase calls made or served from cache", "calls"),
+            "errors_total": ("counter", "Supabase calls that raised", "errors"),
+            "rows_total": ("counter", "Rows returned", "rows"),
+            "bytes_total": ("counter", "Approximate JSON bytes returned", "bytes"),
+            "seconds_total": ("counter", "Wall time spent in calls", "seconds"),
+        }
+        with self._lock:
+            totals = dict(self.totals)
+        lines = []
+        for name, (kind, help_text, field) in metrics.items():
+            lines.append(f"# HELP finance_supabase_{name} {help_text}")
+            lines.append(f"# TYPE finance_supabase_{name} {kind}")
+            for (method, table, op, cache_hit), total in sorted(totals.items(), key=str):
+                labels = f'method="{method}",table="{table}",op="{op}",cache="{"hit" if cache_hit else "miss"}"'
+                lines.append(f"finance_supabase_{name}{{{labels}}} {total[field]}")
+        return "\n".join(lines) + "\n"
+
+
+def active():
+    """The session's CallMetrics when the sidebar debug toggle is on, else None."""
+    try:
+        if st.session_state.get("debug_metrics"):
+            if "_call_metrics" not in st.session_state:
+                st.session_state._call_metrics = CallMetrics()
+            return st.session_state._call_metrics
+    except Exception:
+        # No session (e.g. a thread without a script context)
+        pass
+    return None
+
+
+# --- Method attribution ---
+def current_method():
+    stack = getattr(_local, "stack", None)
+    return stack[0] if stack else "-"
+
+
+def _push(name):
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    _local.stack.append(name)
+
+
+def _pop():
+    _local.stack.pop()
+
+
+def _traced(fn):
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def gen_wrapper(*args, **kwargs):
+            # Attribute only the generator's own steps, not the consumer's work between them
+            gen = fn(*args, **kwargs)
+            while True:
+                _push(fn.__name__)
+                try:
+                    item = next(gen)
+                except StopIteration:
+                    return
+                finally:
+                    _pop()
+                yield item
+        return gen_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _push(fn.__name__)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _pop()
+    return wrapper
+
+
+def trace_methods(cls):
+    """Class decorator: calls recorded inside a public method are attributed to it
+    (the outermost one, for nested calls)."""
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(attr):
+            setattr(cls, name, _traced(attr))
+    return cls
+
+
+# --- Client instrumentation ---
+def _size(data):
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    try:
+        return len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _rows(data):
+    if isinstance(data, list):
+        return len(data)
+    return 1 if data else 0
+
+
+class _TracedQuery:
+    """Wraps a postgrest request builder; records the request on execute()."""
+
+    def __init__(self, query, recorder, table, op):
+        self._query = query
+        self._recorder = recorder
+        self._table = table
+        self._op = op
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            # Properties such as `not_` return a builder too; keep tracing it
+            if hasattr(attr, "execute"):
+                return _TracedQuery(attr, self._recorder, self._table, self._op)
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _TracedQuery(result, self._recorder, self._table, name if name in OPERATIONS else self._op)
+            return result
+        return call
+
+    def execute(self):
+        start = time.perf_counter()
+        try:
+            response = self._query.execute()
+        except Exception as e:
+            self._recorder.record(self._table, self._op, seconds=time.perf_counter() - start, error=str(e))
+            raise
+        data = getattr(response, "data", None)
+        self._recorder.record(self._table, self._op, _rows(data), _size(data), time.perf_counter() - start)
+        return response
+
+
+class _TracedBucket:
+    """Wraps a storage bucket; every method call is one request."""
+
+    def __init__(self, bucket, recorder, name):
+        self._bucket = bucket
+        self._recorder = recorder
+        self._table = f"storage:{name}"
+
+    def __getattr__(self, name):
+        attr = getattr(self._bucket, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                self._recorder.record(self._table, name, seconds=time.perf_counter() - start, error=str(e))
+                raise
+            self._recorder.record(self._table, name, _rows(result) if isinstance(result, list) else 0,
+                                  _size(result), time.perf_counter() - start)
+            return result
+        return call
+
+
+class _TracedStorage:
+    def __init__(self, storage, recorder):
+        self._storage = storage
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+    def from_(self, bucket):
+        return _TracedBucket(self._storage.from_(bucket), self._recorder, bucket)
+
+
+class TracedClient:
+    """Supabase client proxy that records every table, rpc and storage call."""
+
+    def __init__(self, client, recorder: CallMetrics):
+        self._client = client
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def table(self, name):
+        return _TracedQuery(self._client.table(name), self._recorder, name, "select")
+
+    from_ = table
+
+    def rpc(self, fn, params=None, **kwargs):
+        return _TracedQuery(self._client.rpc(fn, params or {}, **kwargs), self._recorder, f"rpc:{fn}", "rpc")
+
+    @property
+    def storage(self):
+        return _TracedStorage(self._client.storage, self._recorder)
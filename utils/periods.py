@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+# Budget periods, matching the budgets_period_check constraint in schema.sql
+BUDGET_PERIODS = ["weekly", "monthly", "quarterly", "yearly", "rolling"]
+DEFAULT_WINDOW_DAYS = 30
+
+def _add_months(d: date, months: int):
+    total = d.year * 12 + d.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+def period_window(period: str, as_of: date, index: int = 0, window_days: int = None):
+    """(start, end) of the budget window containing `as_of`, or `index` windows before it.
+
+    Calendar periods start on Monday / the 1st of the month, quarter or year, like
+    Postgres date_trunc; "rolling" is the `window_days` days ending on `as_of`.
+    """
+    if period == "rolling":
+        days = window_days or DEFAULT_WINDOW_DAYS
+        end = as_of - timedelta(days=days * index)
+        return end - timedelta(days=days - 1), end
+    if period == "weekly":
+        start = as_of - timedelta(days=as_of.weekday()) - timedelta(weeks=index)
+        return start, start + timedelta(days=6)
+
+    months = {"monthly": 1, "quarterly": 3, "yearly": 12}[period]
+    first = as_of.replace(day=1)
+    if months == 3:
+        first = first.replace(month=(as_of.month - 1) // 3 * 3 + 1)
+    elif months == 12:
+        first = first.replace(month=1)
+    start = _add_months(first, -months * index)
+    return start, _add_months(start, months) - timedelta(days=1)
+
+def period_label(period: str, window_days: int = None):
+    if period == "rolling":
+        return f"Rolling {window_days or DEFAULT_WINDOW_DAYS} days"
+    return period.title()
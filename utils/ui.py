@@ -1,6 +1,9 @@
 import streamlit as st
 import streamlit.components.v1 as components
 from services.supabase_client import SupabaseClient
+from services.replica_service import LocalReplica
+from utils import metrics
+import time
 
 def inject_custom_css():
     try:
@@ -46,10 +49,68 @@ def setup_sidebar(ignore_login=False):
         st.sidebar.caption(f"Logged in as: {st.session_state.user.email}")
         
         st.sidebar.divider()
+
+        show_replica_controls()
+        show_debug_panel()
         
         if st.sidebar.button("Logout", key="logout_btn"):
             supabase = SupabaseClient.get_instance()
             supabase.auth.sign_out()
+            SupabaseClient.release_session()
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.rerun()
+
+def show_replica_controls():
+    """Sidebar toggle for reading from the server-side replica, with sync status.
+    Shown only when the deployment sets REPLICA_DIR."""
+    if not LocalReplica.directory():
+        return
+    enabled = st.sidebar.toggle("Offline replica", key="use_replica",
+                                help="Keep a copy of your data on this app's server; reads skip the network "
+                                     "and keep working while Supabase is unreachable. It does not make "
+                                     "the app usable without an internet connection.")
+    if not enabled:
+        return
+
+    replica = LocalReplica.for_user(st.session_state.user.id)
+    if st.sidebar.button("Sync now", key="replica_sync_btn"):
+        try:
+            stats = replica.sync(SupabaseClient.get_instance())
+            st.sidebar.caption(f"Pushed {stats['pushed']}, pulled {stats['pulled']}, removed {stats['deleted']}.")
+        except Exception as e:
+            st.sidebar.error(f"Sync failed: {e}")
+
+    if replica.last_sync:
+        st.sidebar.caption(f"Last sync: {time.strftime('%H:%M:%S', time.localtime(replica.last_sync))}")
+    if replica.last_error:
+        st.sidebar.caption(f"⚠️ Offline: {replica.last_error}")
+    outbox = replica.outbox_status()
+    if outbox["pending"]:
+        st.sidebar.caption(f"{outbox['pending']} change(s) waiting to upload")
+    if outbox["failed"]:
+        st.sidebar.warning(f"{outbox['failed']} queued change(s) were rejected by the server")
+
+def show_debug_panel():
+    """Sidebar toggle that records every Supabase call and shows the previous rerun's."""
+    enabled = st.sidebar.toggle("Debug metrics", key="debug_metrics",
+                                help="Time every Supabase call (and cache hit) and list them per rerun.")
+    if not enabled:
+        return
+
+    recorder = metrics.active()
+    recorder.begin_rerun()
+    with st.sidebar.expander("Supabase calls (previous run)"):
+        records = recorder.last
+        if not records:
+            st.caption("No calls recorded yet; interact with the page to populate.")
+        else:
+            hits = sum(r["cache_hit"] for r in records)
+            total_ms = sum(r["seconds"] for r in records) * 1000
+            total_kb = sum(r["bytes"] for r in records) / 1024
+            st.caption(f"{len(records) - hits} request(s), {hits} cache hit(s), {total_ms:.0f} ms, {total_kb:.0f} KB")
+            st.dataframe(recorder.summary(), hide_index=True, width="stretch")
+        st.download_button("Export Prometheus", recorder.to_prometheus(), file_name="supabase_metrics.prom",
+                           mime="text/plain", key="debug_export_prom")
+        st.download_button("Export JSON lines", recorder.to_jsonl(), file_name="supabase_calls.jsonl",
+                           mime="application/x-ndjson", key="debug_export_jsonl")